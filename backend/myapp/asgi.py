@@ -0,0 +1,159 @@
+# Async entry point: uvicorn --app-dir backend/myapp asgi:app
+#
+# The hot read-only listings are served natively on the event loop with Motor,
+# so a slow Atlas round trip no longer pins a worker. Every other /api/* route
+# falls through to the Flask app on a thread pool, which keeps routes, response
+# bodies and model behaviour identical to the gunicorn deployment.
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from a2wsgi import WSGIMiddleware
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from serialization.json_response import encode_json
+from database.connection import mongo_uri, client_options, register_pool_stats
+from app import app as flask_app
+from blueprints.personal import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from core.auth import user_cache, get_user_id_from_token
+from core.groups import user_groups_pipeline, user_group_json
+from core.models import User, PersonalExpense, Group
+
+# Threads available to the Flask routes that are not ported
+WSGI_WORKERS = 10
+
+motor = {}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Created inside the running loop so every uvicorn worker gets its own client
+    client = AsyncIOMotorClient(mongo_uri(), event_listeners=[register_pool_stats('motor')], **client_options())
+    motor['client'] = client
+    motor['db'] = client.get_default_database()
+    yield
+    motor.clear()
+    client.close()
+
+
+def json_response(payload, status=200):
+    # Encoded like Flask's jsonify so bodies match the WSGI routes byte for byte
+    return Response(encode_json(payload, flask_app.json.dumps), status_code=status, media_type="application/json")
+
+
+async def authenticate(request):
+    # Async counterpart of require_user; returns (user_id, None) or (None, error response)
+    token = request.headers.get('Authorization')
+    if not token:
+        return None, json_response({"success": False, "message": "Authentication token is missing"}, 401)
+
+    user_id = get_user_id_from_token(token, flask_app.config['SECRET_KEY'])
+    if not user_id:
+        return None, json_response({"success": False, "message": "Invalid or expired token"}, 401)
+
+    if user_cache.get(user_id) is None:
+        raw = await motor['db'][User._get_collection_name()].find_one({'_id': ObjectId(user_id)})
+        if raw is None:
+            return None, json_response({"success": False, "message": "User not found"}, 404)
+        user_cache.set(user_id, User._from_son(raw))
+    return ObjectId(user_id), None
+
+
+async def get_expenses(request):
+    user_id, error = await authenticate(request)
+    if error:
+        return error
+
+    try:
+        limit = min(max(int(request.query_params.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return json_response({"success": False, "message": "Limit must be a number"}, 400)
+
+    query = {'user_id': user_id}
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        try:
+            last_date, last_id = decode_cursor(cursor)
+        except Exception:
+            return json_response({"success": False, "message": "Invalid cursor"}, 400)
+        query['$or'] = [{'date': {'$lt': last_date}}, {'date': last_date, '_id': {'$gt': last_id}}]
+
+    collection = motor['db'][PersonalExpense._get_collection_name()]
+    page = await collection.find(query).sort([('date', -1), ('_id', 1)]).limit(limit + 1).to_list(None)
+    next_cursor = encode_cursor(page[limit - 1]['date'], page[limit - 1]['_id']) if len(page) > limit else None
+    return json_response({
+        "success": True,
+        "expenses": [PersonalExpense.raw_to_json(raw) for raw in page[:limit]],
+        "next_cursor": next_cursor
+    })
+
+
+async def list_personal_expenses(user_id, start=None, end=None):
+    query = {'user_id': user_id}
+    if start or end:
+        query['date'] = {}
+        if start:
+            query['date']['$gte'] = start
+        if end:
+            query['date']['$lte'] = end
+    collection = motor['db'][PersonalExpense._get_collection_name()]
+    raws = await collection.find(query).sort('date', 1).to_list(None)
+    return [PersonalExpense.raw_to_json(raw) for raw in raws]
+
+
+async def get_expenses_by_date_range(request):
+    user_id, error = await authenticate(request)
+    if error:
+        return error
+
+    start_date_str = request.query_params.get('start')
+    end_date_str = request.query_params.get('end')
+    start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else None
+    end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else None
+
+    expenses = await list_personal_expenses(user_id, start_date, end_date)
+    return json_response({"success": True, "expenses": expenses})
+
+
+async def get_all_expenses(request):
+    user_id, error = await authenticate(request)
+    if error:
+        return error
+
+    expenses = await list_personal_expenses(user_id)
+    return json_response({"success": True, "expenses": expenses})
+
+
+async def get_user_groups(request):
+    user_id, error = await authenticate(request)
+    if error:
+        return error
+
+    try:
+        collection = motor['db'][Group._get_collection_name()]
+        raws = await collection.aggregate(user_groups_pipeline(user_id)).to_list(None)
+        data = [user_group_json(raw) for raw in raws]
+        return json_response({"success": True, "data": data})
+    except Exception as e:
+        print(str(e))
+        return json_response({"success": False, "message": "Error fetching groups", "error": str(e)}, 500)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/personal_expenses', get_expenses, methods=['GET']),
+        Route('/api/dashboard/get_expenses', get_expenses_by_date_range, methods=['GET']),
+        Route('/api/dashboard/get_all_expenses', get_all_expenses, methods=['GET']),
+        Route('/api/groups', get_user_groups, methods=['GET']),
+        Mount('/', app=WSGIMiddleware(flask_app, workers=WSGI_WORKERS))
+    ],
+    # Same origin policy as flask_cors; headers set by the Flask routes are replaced, not duplicated
+    middleware=[Middleware(CORSMiddleware, allow_origins=["http://localhost:3000"],
+                           allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan
+)
@@ -0,0 +1,40 @@
+import argparse
+import json
+
+# Timing fields compared between two runs, the first one present is used
+TIMING_FIELDS = ["best_ms", "p50_ms"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change reported as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = 0
+    for section in ["micro", "endpoints", "startup"]:
+        for name in sorted(set(baseline.get(section, {})) & set(candidate.get(section, {}))):
+            before, after = baseline[section][name], candidate[section][name]
+            field = next((field for field in TIMING_FIELDS if field in before and field in after), None)
+            if field is None or not before[field]:
+                continue
+            change = after[field] / before[field] - 1
+            flag = ""
+            if change > args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            elif change < -args.threshold:
+                flag = "  faster"
+            print(f"{section}/{name}: {before[field]} -> {after[field]} ms ({change:+.1%}){flag}")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
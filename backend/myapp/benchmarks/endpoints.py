@@ -0,0 +1,87 @@
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+from benchmarks.generators import make_id
+
+
+def personal_cases():
+    return {
+        "personal_expenses_page_50": "/api/personal_expenses?limit=50",
+        "personal_expenses_page_200": "/api/personal_expenses?limit=200",
+        "dashboard_get_all_expenses": "/api/dashboard/get_all_expenses",
+        "dashboard_get_expenses_year": "/api/dashboard/get_expenses?start=2022-01-01&end=2022-12-31",
+        "dashboard_summary": "/api/dashboard/summary?granularity=month",
+        "dashboard_month_summary": "/api/dashboard/month_summary?month=2022-06"
+    }
+
+
+def group_cases(group_id):
+    return {
+        "groups": "/api/groups",
+        "group_members": f"/api/groups/{group_id}/members",
+        "group_expenses": f"/api/groups/{group_id}/expenses",
+        "group_settlement_summary": f"/api/groups/{group_id}/settlement_summary",
+        "group_settlement_fewest": f"/api/groups/{group_id}/settlement_summary?fewest_transfers=true"
+    }
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def endpoint_benchmarks(requests=20):
+    # Runs the real routes through the Flask test client against the seeded database.
+    # User 0 and group 0 are the heaviest in the generated data.
+    from app import app
+    from core.models import Group
+    from database.connection import init_db
+
+    init_db()
+
+    group = Group.objects(id=make_id('group', 0)).only('admin').as_pymongo().first()
+    if group is None:
+        raise SystemExit("Group 0 not found, seed the database first with python -m benchmarks.seed")
+    client = app.test_client()
+    runs = [
+        (str(make_id('user', 0)), personal_cases()),
+        (str(group['admin']), group_cases(group['_id']))
+    ]
+
+    results = {}
+    for user_id, cases in runs:
+        token = jwt.encode({"user_id": user_id, "exp": datetime.utcnow() + timedelta(hours=1)},
+                           app.config['SECRET_KEY'], algorithm="HS256")
+        headers = {"Authorization": f"Bearer {token}"}
+        for name, path in cases.items():
+            results[name] = time_endpoint(client, path, headers, requests)
+            print(f"{name}: {results[name]['status']} p50 {results[name]['p50_ms']} ms "
+                  f"p95 {results[name]['p95_ms']} ms")
+    return results
+
+
+def time_endpoint(client, path, headers, requests):
+    # One warm-up request fills the token, user and group caches
+    response = client.get(path, headers=headers)
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+    result = {
+        "status": response.status_code,
+        "bytes": len(response.data),
+        "best_ms": round(min(timings), 3),
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3)
+    }
+    etag = response.headers.get('ETag')
+    if etag:
+        # The revalidation a browser does when nothing changed
+        started = time.perf_counter()
+        cached = client.get(path, headers={**headers, "If-None-Match": etag})
+        result["not_modified_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        result["not_modified_status"] = cached.status_code
+    return result
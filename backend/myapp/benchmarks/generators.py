@@ -0,0 +1,141 @@
+import random
+import string
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from core.splits import normalize_split
+
+
+# Data set sizes; every generator is lazy so the large scale streams instead of
+# building ten million documents in memory
+SCALES = {
+    'small': {'users': 200, 'personal_expenses': 20000, 'groups': 40, 'group_expenses': 4000},
+    'medium': {'users': 10000, 'personal_expenses': 1000000, 'groups': 2000, 'group_expenses': 200000},
+    'large': {'users': 100000, 'personal_expenses': 10000000, 'groups': 20000, 'group_expenses': 2000000}
+}
+
+CATEGORIES = ["Food", "Travel", "Shopping", "Bills", "Health", "Entertainment", "Education", "Other"]
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Dara", "Eli", "Farah", "Gita", "Hugo", "Ines", "Jon", "Kofi", "Lena"]
+LAST_NAMES = ["Gupta", "Smith", "Wang", "Okafor", "Silva", "Novak", "Khan", "Muller", "Sato", "Reyes"]
+WORDS = ["coffee", "groceries", "taxi", "rent", "dinner", "movie", "train", "books", "pharmacy", "gift"]
+
+# Ids are derived from the index so the same seed gives the same ids on every run
+_ID_PREFIX = {'user': 0x60000001, 'personal_expense': 0x60000002, 'group': 0x60000003, 'group_expense': 0x60000004}
+_START = datetime(2021, 1, 1)
+_DAYS = 3 * 365
+
+
+def make_id(kind, index):
+    return ObjectId(f"{_ID_PREFIX[kind]:08x}{index:016x}")
+
+
+def skewed_index(rng, count):
+    # Low indexes are much more likely, so user 0 and group 0 are the heavy ones
+    return min(int(count * rng.random() ** 3), count - 1)
+
+
+def random_date(rng):
+    return _START + timedelta(days=rng.randrange(_DAYS), seconds=rng.randrange(86400))
+
+
+def random_amount(rng):
+    # Mostly small amounts with a long tail, two decimals like user input
+    return round(min(rng.lognormvariate(3, 1), 5000), 2) or 0.01
+
+
+def generate_users(count, password_hash, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            "_id": make_id('user', i),
+            "username": f"user{i}",
+            "password": password_hash,
+            "first_name": first,
+            "last_name": last,
+            "email": f"user{i}@example.com",
+            "budget": float(rng.choice([500, 1000, 2000, 5000])),
+            "data_version": 0
+        }
+
+
+def generate_personal_expenses(count, users, seed=0):
+    rng = random.Random(seed + 1)
+    for i in range(count):
+        yield {
+            "_id": make_id('personal_expense', i),
+            "user_id": make_id('user', skewed_index(rng, users)),
+            "amount": random_amount(rng),
+            "name": f"{rng.choice(WORDS)} {i}",
+            "date": random_date(rng),
+            "category": rng.choice(CATEGORIES)
+        }
+
+
+def group_members(group_index, users, seed=0):
+    # Same members every time for a given group, so expenses can be generated without keeping groups around
+    rng = random.Random(f"{seed}-group-{group_index}")
+    size = min(users, rng.randint(3, 10))
+    return [make_id('user', index) for index in rng.sample(range(users), size)]
+
+
+def generate_groups(count, users, seed=0):
+    rng = random.Random(seed + 2)
+    for i in range(count):
+        members = group_members(i, users, seed)
+        yield {
+            "_id": make_id('group', i),
+            "groupName": f"Group {i}",
+            "admin": members[0],
+            "members": members[1:],
+            "date_created": _START,
+            "passphrase": ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(16)),
+            "data_version": 0
+        }
+
+
+def random_split(rng, members):
+    # Shares are percentages keyed by user id strings, as the frontend sends them
+    roll = rng.random()
+    if roll < 0.6:
+        sharers = rng.sample(members, rng.randint(1, len(members)))
+        return 'equal', {str(member): 100 / len(sharers) for member in sharers}
+    if roll < 0.85:
+        sharers = rng.sample(members, rng.randint(1, len(members)))
+        weights = [rng.randint(1, 10) for _ in sharers]
+        return 'percentage', {str(member): weight * 100 / sum(weights) for member, weight in zip(sharers, weights)}
+    if roll < 0.95:
+        return 'payment', {str(rng.choice(members)): 100}
+    return 'custom', {str(member): 100 / len(members) for member in members}
+
+
+def generate_group_expenses(count, groups, users, seed=0):
+    rng = random.Random(seed + 3)
+    for i in range(count):
+        group_index = skewed_index(rng, groups)
+        members = group_members(group_index, users, seed)
+        payer = rng.choice(members)
+        split_method, shares = random_split(rng, members)
+        amount = random_amount(rng)
+        yield {
+            "_id": make_id('group_expense', i),
+            "group_id": make_id('group', group_index),
+            "paidBy": payer,
+            "amount": amount,
+            "description": f"{rng.choice(WORDS)} {i}",
+            "paid_for": [ObjectId(user_id) for user_id in shares],
+            "splitMethod": split_method,
+            "splitDetails": {"payer": str(payer), "shares": shares},
+            "owed": normalize_split(split_method, amount, {"shares": shares})[0],
+            "date": random_date(rng)
+        }
+
+
+def settlement_expenses(members, count, seed=0):
+    # Expenses in the plain dict shape bill_settle works on
+    rng = random.Random(seed + 4)
+    people = [f"user{i}" for i in range(members)]
+    for _ in range(count):
+        _, shares = random_split(rng, people)
+        yield {"payer": rng.choice(people), "amount": random_amount(rng), "shares": shares}
@@ -0,0 +1,67 @@
+import io
+import time
+
+from benchmarks.generators import (generate_personal_expenses, generate_group_expenses, settlement_expenses,
+                                   make_id)
+from bill_settlement.bill_settle import settle_balances, compute_balances, expense_deltas
+from exports.stream import generate_export, PERSONAL_EXPENSE_COLUMNS
+from imports.parsers import iter_csv_rows
+
+
+def measure(func, min_time=0.2, repeat=5):
+    # Calibrate the loop count to about min_time, then keep the best of several runs
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(min_time / elapsed * 1.2))
+    runs = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        runs.append((time.perf_counter() - started) / loops)
+    return {"best_ms": round(min(runs) * 1000, 4), "mean_ms": round(sum(runs) / len(runs) * 1000, 4), "loops": loops}
+
+
+def micro_benchmarks(seed=0):
+    # Pure functions only, nothing here talks to Mongo
+    from app import app
+    from core.models import PersonalExpense, GroupExpense
+    from serialization.json_response import encode_json
+
+    expenses = list(settlement_expenses(50, 10000, seed))
+    balances = compute_balances(expenses)
+    small_balances = compute_balances(list(settlement_expenses(10, 200, seed)))
+    personal_rows = list(generate_personal_expenses(10000, 1, seed))
+    group_rows = list(generate_group_expenses(1000, 1, 50, seed))
+    usernames = {make_id('user', i): f"user{i}" for i in range(50)}
+    group_documents = [GroupExpense._from_son(row, _auto_dereference=False) for row in group_rows]
+    csv_payload = ("Date,Description,Amount,Category\n" + "\n".join(
+        f"{row['date']:%Y-%m-%d},{row['name']},{row['amount']},{row['category']}" for row in personal_rows)).encode()
+
+    cases = {
+        "expense_deltas": lambda: expense_deltas(expenses[0]),
+        "compute_balances_10k": lambda: compute_balances(expenses),
+        "settle_balances_greedy_50": lambda: settle_balances(balances),
+        "settle_balances_fewest_10": lambda: settle_balances(small_balances, fewest_transfers=True),
+        "group_expense_to_json_1k": lambda: [expense.to_json(usernames) for expense in group_documents],
+        "group_expense_from_son_1k": lambda: [GroupExpense._from_son(row, _auto_dereference=False) for row in group_rows],
+        "personal_raw_to_json_10k": lambda: [PersonalExpense.raw_to_json(row) for row in personal_rows],
+        "personal_encode_json_10k": lambda: encode_json(
+            {"success": True, "expenses": [PersonalExpense.raw_to_json(row) for row in personal_rows]}, app.json.dumps),
+        "export_csv_gzip_10k": lambda: sum(len(chunk) for chunk in generate_export(
+            iter(personal_rows), PersonalExpense.raw_to_json, 'csv', PERSONAL_EXPENSE_COLUMNS, True)),
+        "import_csv_parse_10k": lambda: sum(1 for _ in iter_csv_rows(io.BytesIO(csv_payload)))
+    }
+
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure(func)
+        print(f"{name}: best {results[name]['best_ms']} ms")
+    return results
+
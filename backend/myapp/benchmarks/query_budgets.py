@@ -0,0 +1,81 @@
+import os
+from datetime import datetime, timedelta
+
+import jwt
+
+from benchmarks.endpoints import personal_cases, group_cases
+from benchmarks.generators import make_id
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+# Most Mongo commands each route may issue with warm caches. Raise a budget
+# only together with the change that needs it, never to make a run pass.
+QUERY_BUDGETS = {
+    "personal_expenses_page_50": 2,
+    "personal_expenses_page_200": 2,
+    "dashboard_get_all_expenses": 3,
+    "dashboard_get_expenses_year": 3,
+    "dashboard_summary": 3,
+    "dashboard_month_summary": 2,
+    "groups": 2,
+    "group_members": 2,
+    "group_expenses": 3,
+    "group_settlement_summary": 3,
+    "group_settlement_fewest": 3
+}
+
+
+def budget_cases():
+    # (name, path, user_id) of every budgeted route, for user 0 and the admin of group 0
+    from core.models import Group
+
+    group = Group.objects(id=make_id('group', 0)).only('admin').as_pymongo().first()
+    if group is None:
+        raise SystemExit("Group 0 not found, seed the database first with python -m benchmarks.seed")
+    cases = [(name, path, make_id('user', 0)) for name, path in personal_cases().items()]
+    cases += [(name, path, group['admin']) for name, path in group_cases(group['_id']).items()]
+    return cases
+
+
+def request_within_budget(client, name, path, user_id, secret_key):
+    # Raises AssertionError, listing every command, when the route goes over its budget
+    from monitoring.query_tracker import query_budget
+
+    token = jwt.encode({"user_id": str(user_id), "exp": datetime.utcnow() + timedelta(hours=1)},
+                       secret_key, algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    # Warm the token, user and group caches so only the route's own queries count
+    client.get(path, headers=headers)
+    with query_budget(QUERY_BUDGETS[name]) as tracker:
+        response = client.get(path, headers=headers)
+    return response, tracker
+
+
+def check_budgets():
+    # Imported late so SECRET_KEY is set and the listener is installed before the clients exist
+    from app import app
+    from database.connection import init_db
+
+    init_db()
+    client = app.test_client()
+    failures = 0
+    for name, path, user_id in budget_cases():
+        try:
+            _, tracker = request_within_budget(client, name, path, user_id, app.config['SECRET_KEY'])
+            print(f"ok   {name}: {tracker.count}/{QUERY_BUDGETS[name]}")
+        except AssertionError as e:
+            failures += 1
+            print(f"FAIL {name}: {e}")
+    return failures
+
+
+def main():
+    from benchmarks.seed import require_local_database
+    require_local_database()
+    failures = check_budgets()
+    print(f"{failures} endpoint(s) over budget")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
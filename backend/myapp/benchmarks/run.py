@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+from benchmarks.generators import SCALES
+
+# The app module reads this at import time; a fixed key lets the suite mint tokens
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backend benchmarks and store the results as JSON")
+    parser.add_argument("--micro", action="store_true", help="pure function benchmarks, no database needed")
+    parser.add_argument("--endpoints", action="store_true", help="route benchmarks against the seeded DB_URI")
+    parser.add_argument("--seed-scale", choices=sorted(SCALES), help="seed the database before the endpoint run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=20, help="timed requests per endpoint")
+    parser.add_argument("--startup", action="store_true", help="import-to-first-request time in fresh processes")
+    parser.add_argument("--startup-samples", type=int, default=5)
+    parser.add_argument("--output", help="defaults to benchmarks/results/<timestamp>.json")
+    args = parser.parse_args()
+    if not args.micro and not args.endpoints and not args.startup:
+        args.micro = True
+
+    results = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec='seconds'),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "scale": args.seed_scale
+        }
+    }
+
+    if args.micro:
+        from benchmarks.micro import micro_benchmarks
+        results["micro"] = micro_benchmarks(args.seed)
+
+    if args.endpoints:
+        from benchmarks.seed import require_local_database, seed_database
+        require_local_database()
+        if args.seed_scale:
+            results["seeding_s"] = seed_database(SCALES[args.seed_scale], args.seed)
+        from benchmarks.endpoints import endpoint_benchmarks
+        results["endpoints"] = endpoint_benchmarks(args.requests)
+
+    if args.startup:
+        from benchmarks.startup import startup_benchmarks
+        results["startup"] = startup_benchmarks(args.startup_samples)
+
+    output = args.output or os.path.join(os.path.dirname(__file__), "results",
+                                         datetime.utcnow().strftime('%Y%m%dT%H%M%S') + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import itertools
+import os
+import time
+
+import bcrypt
+
+from benchmarks.generators import (SCALES, generate_users, generate_personal_expenses, generate_groups,
+                                   generate_group_expenses)
+
+INSERT_BATCH_SIZE = 10000
+# Every seeded user logs in with this password
+BENCHMARK_PASSWORD = "benchmark"
+
+
+def require_local_database(allow_remote=False):
+    # Seeding drops collections, so never run it against the Atlas cluster by accident
+    uri = os.getenv("DB_URI")
+    if not uri:
+        raise SystemExit("Set DB_URI to a scratch database, e.g. mongodb://127.0.0.1:27017/expenses_benchmark")
+    if uri.startswith("mongodb+srv://") and not allow_remote:
+        raise SystemExit("DB_URI points at a remote cluster; pass --allow-remote if that is really intended")
+
+
+def insert_batched(collection, documents):
+    inserted = 0
+    documents = iter(documents)
+    while True:
+        batch = list(itertools.islice(documents, INSERT_BATCH_SIZE))
+        if not batch:
+            return inserted
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+
+
+def seed_database(sizes, seed=0):
+    # Imported here so DB_URI is checked before anything connects
+    from core.ledger import rebuild_group_ledger
+    from core.models import User, PersonalExpense, Group, GroupExpense, GroupLedger, ExpenseRollup
+    from database.connection import init_db
+
+    init_db()
+
+    # The cheapest bcrypt cost; logins upgrade it to BCRYPT_ROUNDS on first use
+    password_hash = bcrypt.hashpw(BENCHMARK_PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+    for document in [User, PersonalExpense, Group, GroupExpense, GroupLedger, ExpenseRollup]:
+        document.drop_collection()
+        document.ensure_indexes()
+
+    timings = {}
+    steps = [
+        ('users', lambda: insert_batched(User._get_collection(), generate_users(sizes['users'], password_hash, seed))),
+        ('personal_expenses', lambda: insert_batched(PersonalExpense._get_collection(), generate_personal_expenses(
+            sizes['personal_expenses'], sizes['users'], seed))),
+        ('groups', lambda: insert_batched(Group._get_collection(), generate_groups(sizes['groups'], sizes['users'], seed))),
+        ('group_expenses', lambda: insert_batched(GroupExpense._get_collection(), generate_group_expenses(
+            sizes['group_expenses'], sizes['groups'], sizes['users'], seed))),
+        ('expense_rollups', lambda: build_rollups(User, PersonalExpense, ExpenseRollup)),
+        ('group_ledgers', lambda: build_ledgers(Group, rebuild_group_ledger))
+    ]
+    for name, step in steps:
+        started = time.perf_counter()
+        count = step()
+        timings[name] = round(time.perf_counter() - started, 2)
+        print(f"{name}: {count} in {timings[name]}s")
+    return timings
+
+
+def build_rollups(User, PersonalExpense, ExpenseRollup):
+    # Server-side backfill of every user's rollups in one pipeline, same rounding as to_cents
+    PersonalExpense._get_collection().aggregate([
+        {'$group': {
+            '_id': {'user_id': '$user_id', 'month': {'$dateToString': {'format': '%Y-%m', 'date': '$date'}},
+                    'category': '$category'},
+            'count': {'$sum': 1},
+            'total_cents': {'$sum': {'$toLong': {'$round': [{'$multiply': ['$amount', 100]}, 0]}}}
+        }},
+        {'$project': {'_id': 0, 'user_id': '$_id.user_id', 'month': '$_id.month', 'category': '$_id.category',
+                      'count': 1, 'total_cents': 1}},
+        {'$merge': {'into': ExpenseRollup._get_collection_name(), 'on': ['user_id', 'month', 'category'],
+                    'whenMatched': 'replace', 'whenNotMatched': 'insert'}}
+    ], allowDiskUse=True)
+    User._get_collection().update_many({}, {'$set': {'rollups_built': True}})
+    return ExpenseRollup.objects.count()
+
+
+def build_ledgers(Group, rebuild_group_ledger):
+    count = 0
+    for group in Group.objects.only('id'):
+        rebuild_group_ledger(group.id)
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a scratch database with seeded synthetic data")
+    parser.add_argument("--scale", choices=sorted(SCALES), default='small')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--allow-remote", action="store_true")
+    args = parser.parse_args()
+
+    require_local_database(args.allow_remote)
+    seed_database(SCALES[args.scale], args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.endpoints import percentile
+
+# Runs in a fresh interpreter each time, so nothing is imported or connected beforehand.
+# The first request needs no Mongo query; the second one builds the MongoClient.
+CHILD = """
+import json, os, time
+started = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+client = app.test_client()
+client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + os.environ['OPS_TOKEN']
+first = client.get('/api/auth/hashing_stats')
+first_request = time.perf_counter()
+query = client.get('/api/outbox/stats')
+first_query = time.perf_counter()
+print(json.dumps({
+    "import": (imported - started) * 1000,
+    "first_request": (first_request - imported) * 1000,
+    "first_query": (first_query - first_request) * 1000,
+    "total": (first_query - started) * 1000,
+    "status": [first.status_code, query.status_code]
+}))
+"""
+
+PHASES = ["import", "first_request", "first_query", "total"]
+
+
+def measure_once():
+    # The two stats routes it calls need an ops token
+    env = {**os.environ, "OPS_TOKEN": os.getenv("OPS_TOKEN") or "startup-benchmark"}
+    output = subprocess.run([sys.executable, "-c", CHILD], check=True, capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def startup_benchmarks(samples=5):
+    # Import-to-first-request time of a new worker, against whatever DB_URI points at
+    runs = [measure_once() for _ in range(samples)]
+    results = {}
+    for phase in PHASES:
+        timings = [run[phase] for run in runs]
+        results[phase] = {
+            "best_ms": round(min(timings), 3),
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "max_ms": round(max(timings), 3)
+        }
+        print(f"startup {phase}: p50 {results[phase]['p50_ms']} ms best {results[phase]['best_ms']} ms")
+    results["total"]["status"] = runs[-1]["status"]
+    return results
@@ -0,0 +1,83 @@
+import argparse
+import random
+import timeit
+
+from bill_settlement.bill_settle import settle_expenses, settle_balances
+
+
+# Copy of the original list-based implementation, kept only for comparison
+def legacy_settle_expenses(expenses):
+    balances = {}
+    for expense in expenses:
+        payer = expense["payer"]
+        amount = expense["amount"]
+        balances[payer] = balances.get(payer, 0) - amount
+        for person, percentage in expense["shares"].items():
+            balances[person] = balances.get(person, 0) + (percentage / 100) * amount
+    return legacy_settle_balances(balances)
+
+
+def legacy_settle_balances(balances):
+    debtors = sorted([(person, amount) for person, amount in balances.items() if amount < 0], key=lambda x: x[1])
+    creditors = sorted([(person, amount) for person, amount in balances.items() if amount > 0], key=lambda x: -x[1])
+
+    settlements = []
+    while debtors and creditors:
+        debtor, debt_amount = debtors[0]
+        creditor, credit_amount = creditors[0]
+        settle_amount = min(-debt_amount, credit_amount)
+        settlements.append((creditor, debtor, settle_amount))
+        if -debt_amount > credit_amount:
+            creditors.pop(0)
+        elif -debt_amount < credit_amount:
+            debtors.pop(0)
+        else:
+            debtors.pop(0)
+            creditors.pop(0)
+    return settlements
+
+
+def generate_expenses(members, expenses, seed=0):
+    # Random equal/percentage splits shaped like the ones the frontend sends
+    rng = random.Random(seed)
+    people = [f"user{i}" for i in range(members)]
+    result = []
+    for _ in range(expenses):
+        sharers = rng.sample(people, rng.randint(1, min(members, 8)))
+        if rng.random() < 0.5:
+            shares = {person: 100 / len(sharers) for person in sharers}
+        else:
+            weights = [rng.randint(1, 10) for _ in sharers]
+            shares = {person: weight * 100 / sum(weights) for person, weight in zip(sharers, weights)}
+        result.append({
+            "payer": rng.choice(people),
+            "amount": round(rng.uniform(1, 500), 2),
+            "shares": shares
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare settle_expenses with the legacy implementation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for members, count in [(8, 500), (100, 10000), (1000, 20000), (5000, 50000)]:
+        expenses = generate_expenses(members, count, seed=args.seed)
+        new = min(timeit.repeat(lambda: settle_expenses(expenses), number=1, repeat=args.repeat))
+        old = min(timeit.repeat(lambda: legacy_settle_expenses(expenses), number=1, repeat=args.repeat))
+        print(f"{members:>5} members {count:>6} expenses: settle_expenses {new * 1000:8.1f} ms, legacy {old * 1000:8.1f} ms")
+
+    # Matching step alone, where the legacy list.pop(0) loop is quadratic
+    for members in [1000, 10000, 100000]:
+        rng = random.Random(args.seed)
+        amounts = [rng.randint(-100000, 100000) for _ in range(members - 1)]
+        balances = {f"user{i}": cents for i, cents in enumerate(amounts + [-sum(amounts)])}
+        new = min(timeit.repeat(lambda: settle_balances(balances), number=1, repeat=args.repeat))
+        old = min(timeit.repeat(lambda: legacy_settle_balances(balances), number=1, repeat=args.repeat))
+        print(f"{members:>6} balances: settle_balances {new * 1000:8.1f} ms, legacy {old * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,47 +1,141 @@
-def settle_expenses(expenses):
-    # Initialization
-    balances = {}
+import math
+
+
+def to_cents(amount):
+    # Amounts carry at most two decimals, so rounding the scaled float is exact
+    return int(round(float(amount) * 100))
+
+
+def expense_deltas(expense):
+    # Balance changes caused by one expense, in integer cents.
+    # The payer goes down by the amount, every sharer goes up by their share.
+    # Shares are percentages, split with split_cents so the deltas of a 100%
+    # split always sum to exactly zero.
+    amount = to_cents(expense["amount"])
+    shares = expense["shares"]
+    deltas = split_cents(round(amount * sum(shares.values()) / 100), shares) if shares else {}
+    deltas[expense["payer"]] = deltas.get(expense["payer"], 0) - amount
+    return {person: cents for person, cents in deltas.items() if cents}
+
+
+def split_cents(amount_cents, weights):
+    # Splits an amount in cents in proportion to the weights. Leftover cents go to
+    # the largest remainders, so the parts always add up to exactly amount_cents.
+    total = sum(weights.values())
+    return _largest_remainder({person: amount_cents * weight / total for person, weight in weights.items()},
+                              amount_cents)
+
+
+def _largest_remainder(exact, total):
+    # Rounds every value down, then hands the total's leftover units to the
+    # values that lost the most, so the result sums to exactly total
+    parts = {}
+    remainders = []
+    for person, value in exact.items():
+        parts[person] = math.floor(value)
+        remainders.append((parts[person] - value, person))
+
+    leftover = total - sum(parts.values())
+    if leftover > 0:
+        remainders.sort()
+        for _, person in remainders[:leftover]:
+            parts[person] += 1
+    return parts
+
+
+def compute_balances(expenses):
+    # Net balance of every person in cents; positive means the person owes money.
+    # The exact balances are summed first and rounded once, which keeps everyone
+    # within a cent of what they really owe and costs no more than summing floats.
+    exact = {}
+    get = exact.get
     for expense in expenses:
+        amount = float(expense["amount"])
         payer = expense["payer"]
-        amount = expense["amount"]
-        shares = expense["shares"]
-        
-        if payer not in balances:
-            balances[payer] = 0
-        balances[payer] -= amount
-        
-        for person, percentage in shares.items():
-            if person not in balances:
-                balances[person] = 0
-            share_amount = (percentage / 100) * amount
-            balances[person] += share_amount
-
-    # Calculation
-    debtors = sorted([(person, amount) for person, amount in balances.items() if amount < 0], key=lambda x: x[1])
-    creditors = sorted([(person, amount) for person, amount in balances.items() if amount > 0], key=lambda x: -x[1])
-
-    # Settlement
+        exact[payer] = get(payer, 0) - amount
+        for person, percentage in expense["shares"].items():
+            exact[person] = get(person, 0) + amount * percentage / 100
+
+    exact = {person: value * 100 for person, value in exact.items()}
+    balances = _largest_remainder(exact, round(sum(exact.values())))
+    return {person: cents for person, cents in balances.items() if cents}
+
+
+def settle_expenses(expenses, fewest_transfers=False):
+    # Returns (from, to, amount) transfers with amounts in currency units
+    settlements = settle_balances(compute_balances(expenses), fewest_transfers=fewest_transfers)
+    return [(sender, receiver, cents / 100) for sender, receiver, cents in settlements]
+
+
+# Above this many non-zero balances the exact search is too expensive
+FEWEST_TRANSFERS_LIMIT = 12
+
+
+def settle_balances(balances, fewest_transfers=False):
+    # balances: person -> integer cents, positive owes and negative is owed.
+    # Returns (from, to, cents) transfers that bring every balance to zero.
+    balances = {person: cents for person, cents in balances.items() if cents}
+    if fewest_transfers and len(balances) <= FEWEST_TRANSFERS_LIMIT:
+        settlements = []
+        for group in _zero_sum_groups(balances):
+            settlements += _greedy_settle({person: balances[person] for person in group})
+        return settlements
+    return _greedy_settle(balances)
+
+
+def _greedy_settle(balances):
+    # One sort puts the largest credits first and the largest debts last. Two
+    # pointers then walk inwards, and each transfer clears at least one side,
+    # so there are at most n - 1 transfers and the loop itself is O(n).
+    people = sorted(balances, key=balances.__getitem__)
+    low, high = 0, len(people) - 1
+    credit = -balances[people[low]] if people else 0
+    debt = balances[people[high]] if people else 0
+
     settlements = []
-    while debtors and creditors:
-        debtor, debt_amount = debtors[0]
-        creditor, credit_amount = creditors[0]
-        
-        # Determine the settlement amount
-        settle_amount = min(-debt_amount, credit_amount)
-        
-        # Change here: swap the positions of debtor and creditor
-        settlements.append((creditor, debtor, settle_amount))
-        
-        # Update the debt and credit amounts
-        if -debt_amount > credit_amount:
-            debt_amount += settle_amount
-            creditors.pop(0)
-        elif -debt_amount < credit_amount:
-            credit_amount -= settle_amount
-            debtors.pop(0)
-        else:
-            debtors.pop(0)
-            creditors.pop(0)
+    while credit > 0 and debt > 0:
+        amount = min(credit, debt)
+        settlements.append((people[high], people[low], amount))
+
+        # A partly settled person stays in place with the reduced amount
+        credit -= amount
+        debt -= amount
+        if not credit:
+            low += 1
+            credit = -balances[people[low]] if low < len(people) else 0
+        if not debt:
+            high -= 1
+            debt = balances[people[high]] if high >= 0 else 0
 
     return settlements
 
+
+def _zero_sum_groups(balances):
+    # Splitting people into the most subsets that each sum to zero gives the
+    # fewest transfers (n - subsets). Exact DP over subsets, only for small groups.
+    people = sorted(balances)
+    n = len(people)
+    full = (1 << n) - 1
+    totals = [0] * (full + 1)
+    best = [0] * (full + 1)
+    came_from = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        low = mask & -mask
+        totals[mask] = totals[mask ^ low] + balances[people[low.bit_length() - 1]]
+        for i in range(n):
+            bit = 1 << i
+            if mask & bit and best[mask ^ bit] >= best[mask]:
+                best[mask] = best[mask ^ bit]
+                came_from[mask] = mask ^ bit
+        if totals[mask] == 0:
+            best[mask] += 1
+
+    # Walk back down the chain, cutting a group at every zero-sum mask
+    groups = []
+    mask, boundary = full, full
+    while mask:
+        mask = came_from[mask]
+        if totals[mask] == 0:
+            groups.append([people[i] for i in range(n) if (boundary ^ mask) >> i & 1])
+            boundary = mask
+    return groups
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+
+import jwt
+import mongoengine as db
+from flask import Blueprint, current_app, request, jsonify, g
+from jwt import ExpiredSignatureError, DecodeError
+
+from core.auth import (password_hasher, hashing_overloaded_response, require_user, require_ops_token,
+                       invalidate_user, token_cache, user_cache)
+from core.groups import group_access
+from core.mail import send_email
+from core.models import User, Group
+from passwords.hashing import HashingOverloaded
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.route('/api/users/register', methods=['POST'])
+def register_user():
+    try:
+        data = request.get_json()
+        username = data.get('username')
+        plain_password = data.get('password')
+        first_name = data.get('first_name')
+        last_name = data.get('last_name')
+        email = data.get('email')
+
+        # Checking if the user already exists based on username or email
+        existing_user = User.objects(db.Q(username=username) | db.Q(email=email)).first()
+        if existing_user:
+            return jsonify({"success": False, "message": "User with that username or email already exists"}), 400
+
+        # Hashing the password before saving
+        hashed_password = password_hasher.hash_password(plain_password)
+
+        # Create new user
+        new_user = User(
+            username=username,
+            password=hashed_password,
+            first_name=first_name,
+            last_name=last_name,
+            email=email
+        ).save()
+
+        # Generate JWT token
+        token_payload = {
+            "user_id": str(new_user.id),
+            "username": new_user.username,
+            # Token expires after 24 hours
+            "exp": datetime.utcnow() + timedelta(hours=24)  
+        }
+        token = jwt.encode(token_payload, current_app.config['SECRET_KEY'], algorithm="HS256")
+        # send email to welcome user
+        send_email('registration', user_name=new_user.first_name, recipient_email=new_user.email)
+
+        return jsonify({"success": True, "message": "User registered successfully", "token": token, "data": new_user.to_json()}), 201
+
+    except HashingOverloaded as e:
+        return hashing_overloaded_response(e)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return jsonify({"success": False, "message": "An error occurred during registration"}), 500
+
+
+
+@bp.route('/api/verify_token', methods=['POST'])
+def verify_token():
+    data = request.get_json()
+    token = data.get('token')
+
+    if not token:
+        return jsonify({"success": False, "message": "Token is missing"}), 400
+
+    try:
+        # decode the token
+        decoded_token = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+        return jsonify({"success": True, "message": "Token is valid", "user_id": decoded_token["user_id"]}), 200
+    except ExpiredSignatureError:
+        return jsonify({"success": False, "message": "Token has expired"}), 401
+    except DecodeError:
+        return jsonify({"success": False, "message": "Token is invalid"}), 401
+
+
+@bp.route('/api/users/login', methods=['POST'])
+def login():
+    data = request.get_json()
+    username = data.get('username')
+    password = data.get('password')
+    
+    # Check if the user exists
+    user = User.objects(username=username).first()
+    
+    if not user:
+        return jsonify({"success": False, "message": "Invalid username or password"}), 404
+    
+    # Validate the password
+    try:
+        valid = password_hasher.check_password(password, user.password)
+    except HashingOverloaded as e:
+        return hashing_overloaded_response(e)
+
+    if valid:
+        if password_hasher.needs_rehash(user.password):
+            # Stored with an older cost; upgrade it now that we have the plain password
+            try:
+                user.update(set__password=password_hasher.hash_password(password))
+                invalidate_user(user.id)
+            except HashingOverloaded:
+                pass
+        # If valid password, generate and send JWT token
+        token = jwt.encode({"user_id": str(user.id)}, current_app.config['SECRET_KEY'])
+        return jsonify({"success": True, "token": token, "data": user.to_json()}), 200
+    else:
+        return jsonify({"success": False, "message": "Invalid username or password"}), 401
+
+
+@bp.route('/api/users/profile', methods=['GET'])
+@require_user
+def get_user_profile():
+    user = g.user
+
+    # Returning the user's first name and last name
+    return jsonify({
+        "success": True,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "username" :user.username,
+        "email": user.email
+    }), 200
+
+
+@bp.route('/api/auth/cache_stats', methods=['GET'])
+@require_ops_token
+def get_auth_cache_stats():
+    return jsonify({"success": True, "data": {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+        "group_acl": group_access.stats()
+    }}), 200
+
+
+@bp.route('/api/auth/hashing_stats', methods=['GET'])
+@require_ops_token
+def get_hashing_stats():
+    return jsonify({"success": True, "data": password_hasher.stats()}), 200
+
+
+@bp.route('/api/users/update_budget', methods=['PUT'])
+@require_user
+def update_user_budget():
+    user = g.user
+
+    data = request.get_json()
+    new_budget = data.get('budget')
+
+    if new_budget is None:
+        return jsonify({"success": False, "message": "Budget value is required"}), 400
+
+    try:
+        user.update(budget=new_budget, inc__data_version=1)
+        invalidate_user(user.id)
+        # Member listings of the user's groups include the budget
+        Group.objects(db.Q(admin=user) | db.Q(members=user)).update(inc__data_version=1)
+        return jsonify({"success": True, "message": "Budget updated successfully"}), 200
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "An error occurred while trying to update the budget"}), 500
+
+@bp.route('/api/users/get_budget', methods=['GET'])
+@require_user
+def get_user_budget():
+    user = g.user
+
+    try:
+        return jsonify({"success": True, "budget": user.budget}), 200
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "An error occurred while retrieving the budget"}), 500
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, request, jsonify, g
+
+from core.auth import require_user, conditional_get
+from core.models import PersonalExpense
+from core.rollups import ensure_expense_rollups, get_month_rollups
+from serialization.json_response import fast_jsonify
+
+bp = Blueprint('dashboard', __name__)
+
+
+@bp.route('/api/dashboard/get_expenses', methods=['GET'])
+@require_user
+@conditional_get('user')
+def get_expenses_by_date_range():
+    user = g.user
+
+    expenses = (PersonalExpense.objects(user_id=user).order_by('date')
+                .only(*PersonalExpense.LIST_FIELDS).as_pymongo())
+
+    start_date_str = request.args.get('start')
+    end_date_str = request.args.get('end')
+
+    start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else None
+    end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else None
+
+    if start_date:
+        expenses = expenses.filter(date__gte=start_date)
+    if end_date:
+        expenses = expenses.filter(date__lte=end_date)
+
+    return fast_jsonify({
+        "success": True,
+        "expenses": [PersonalExpense.raw_to_json(raw) for raw in expenses]
+    })
+
+@bp.route('/api/dashboard/get_all_expenses', methods=['GET'])
+@require_user
+@conditional_get('user')
+def get_all_expenses():
+    user = g.user
+
+    # Fetch expenses for the user, ordered by date
+    expenses = (PersonalExpense.objects(user_id=user).order_by('date')
+                .only(*PersonalExpense.LIST_FIELDS).as_pymongo())
+    return fast_jsonify({
+        "success": True,
+        "expenses": [PersonalExpense.raw_to_json(raw) for raw in expenses]
+    })
+
+@bp.route('/api/dashboard/summary', methods=['GET'])
+@require_user
+@conditional_get('user')
+def get_dashboard_summary():
+    user = g.user
+
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in ['day', 'week', 'month']:
+        return jsonify({"success": False, "message": "Granularity must be day, week or month"}), 400
+
+    try:
+        start_date = datetime.strptime(request.args['start'], '%Y-%m-%d') if request.args.get('start') else None
+        # The end date is inclusive, so match everything before the following day
+        end_date = datetime.strptime(request.args['end'], '%Y-%m-%d') + timedelta(days=1) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    # One round trip for the selected range, only the aggregated numbers come back
+    try:
+        expenses = PersonalExpense.objects(user_id=user.id)
+        if start_date:
+            expenses = expenses.filter(date__gte=start_date)
+        if end_date:
+            expenses = expenses.filter(date__lt=end_date)
+        result = next(expenses.aggregate([
+            {'$facet': {
+                'totals': [
+                    {'$group': {'_id': None, 'total': {'$sum': '$amount'}, 'count': {'$sum': 1}}}
+                ],
+                'categories': [
+                    {'$group': {'_id': '$category', 'total': {'$sum': '$amount'}, 'count': {'$sum': 1}}},
+                    {'$sort': {'total': -1}}
+                ],
+                'timeline': [
+                    {'$group': {
+                        '_id': {'$dateTrunc': {'date': '$date', 'unit': granularity}},
+                        'total': {'$sum': '$amount'},
+                        'count': {'$sum': 1}
+                    }},
+                    {'$sort': {'_id': 1}}
+                ]
+            }}
+        ]))
+
+        totals = result['totals'][0] if result['totals'] else {'total': 0, 'count': 0}
+        # Month to date comes from the rollups, no scan of this month's expenses
+        current_month = datetime.utcnow().strftime('%Y-%m')
+        ensure_expense_rollups(user)
+        month_total = sum(cents for _, cents in get_month_rollups(user.id, [current_month])[current_month].values()) / 100
+
+        return jsonify({
+            "success": True,
+            "summary": {
+                "start": request.args.get('start'),
+                "end": request.args.get('end'),
+                "granularity": granularity,
+                "total": totals['total'],
+                "count": totals['count'],
+                "categories": [
+                    {"category": row['_id'], "total": row['total'], "count": row['count']}
+                    for row in result['categories']
+                ],
+                "timeline": [
+                    {"period": row['_id'].strftime('%Y-%m-%d'), "total": row['total'], "count": row['count']}
+                    for row in result['timeline']
+                ],
+                "budget": user.budget,
+                "month_to_date": {
+                    "total": month_total,
+                    "remaining": user.budget - month_total,
+                    "over_budget": month_total > user.budget
+                }
+            }
+        }), 200
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "Error building dashboard summary", "error": str(e)}), 500
+
+def month_totals(categories):
+    return {
+        "total": sum(cents for _, cents in categories.values()) / 100,
+        "count": sum(count for count, _ in categories.values()),
+        "categories": [
+            {"category": category, "total": cents / 100, "count": count}
+            for category, (count, cents) in sorted(categories.items(), key=lambda item: -item[1][1])
+        ]
+    }
+
+
+@bp.route('/api/dashboard/month_summary', methods=['GET'])
+@require_user
+@conditional_get('user')
+def get_month_summary():
+    user = g.user
+
+    # Spend of one month against the budget and the same month a year earlier, read from the rollups
+    month = request.args.get('month') or datetime.utcnow().strftime('%Y-%m')
+    try:
+        month_date = datetime.strptime(month, '%Y-%m')
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid month format. Use YYYY-MM"}), 400
+    previous_year = f"{month_date.year - 1:04d}-{month_date.month:02d}"
+
+    ensure_expense_rollups(user)
+    rollups = get_month_rollups(user.id, [month, previous_year])
+    current = month_totals(rollups[month])
+    previous = month_totals(rollups[previous_year])
+    change = (round((current["total"] - previous["total"]) / previous["total"] * 100, 2)
+              if previous["total"] else None)
+
+    return jsonify({
+        "success": True,
+        "summary": {
+            "month": month,
+            **current,
+            "budget": user.budget,
+            "remaining": user.budget - current["total"],
+            "over_budget": current["total"] > user.budget,
+            "previous_year": {"month": previous_year, **previous},
+            "year_over_year_change": change
+        }
+    }), 200
+
+@bp.route('/api/dashboard/get_budget', methods=['GET'])
+@require_user
+@conditional_get('user')
+def get_budget():
+    user = g.user
+
+    try:
+        return jsonify({"success": True, "budget": user.budget}), 200
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "An error occurred while retrieving the budget"}), 500
@@ -0,0 +1,710 @@
+from datetime import datetime
+
+import click
+from bson import ObjectId
+from flask import Blueprint, request, jsonify, g
+from mongoengine.errors import ValidationError
+from pymongo import UpdateOne
+
+from bill_settlement.bill_settle import settle_balances
+from blueprints.personal import export_response, EXPORT_BATCH_SIZE, EXPORT_MIMETYPES
+from core.auth import require_user, conditional_get
+from core.group_deletion import GroupDeletion, group_deletions, find_orphaned_groups
+from core.groups import (group_access, get_group_access, generate_api_key, decode_api_key, user_groups_pipeline,
+                         user_group_json)
+from core.ledger import (ledger_deltas, ensure_group_ledger, update_group_ledger, compute_group_balances,
+                         rebuild_group_ledger, get_group_balance_rows)
+from core.mail import send_email
+from core.splits import normalize_split
+from core.models import (User, Group, GroupExpense, GroupLedger, to_object_id, get_usernames, get_member_emails,
+                         bump_data_version)
+from database.connection import READ_ALIAS
+from exports.stream import GROUP_EXPENSE_COLUMNS
+
+bp = Blueprint('groups', __name__, cli_group=None)
+
+
+@bp.route('/api/groups/create', methods=['POST'])
+@require_user
+def create_group():
+    admin = g.user
+
+    data = request.get_json()
+    group_name = data.get('group_name')
+
+    if not group_name:
+        return jsonify({"success": False, "message": "Group name is required"}), 400
+
+    try:
+        new_group = Group(groupName=group_name, admin=admin).save()
+        GroupLedger(group_id=new_group, balances={}).save()
+        return jsonify({"success": True, "message": "Group created successfully", "data": new_group.to_json()}), 201
+    except Exception as e:
+        return jsonify({"success": False, "message": "Error creating group", "error": str(e)}), 500
+
+@bp.route('/api/groups/<group_id>', methods=['GET'])
+@require_user
+def get_group_details(group_id):
+    user_id = g.user_id
+
+    try:
+        access = get_group_access(group_id, user_id)
+        if not access:
+            return jsonify({"success": False, "message": "Group not found"}), 404
+
+        # Check if the user is either a member or an admin of the group
+        if user_id not in access.member_ids:
+            return jsonify({"success": False, "message": "User is not authorized to view to this group"}), 403
+
+        # References are serialized as ids, so nothing needs to be dereferenced
+        group = Group.objects(id=access.group_id).no_dereference().first()
+        return jsonify({"success": True, "data": group.to_json()}), 200
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "Error fetching group details", "error": str(e)}), 500
+
+
+
+@bp.route('/api/groups/<group_id>/delete', methods=['DELETE'])
+@require_user
+def delete_group(group_id):
+    user_id = g.user_id
+
+    access = get_group_access(group_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    if access.admin_id != user_id:
+        return jsonify({"success": False, "message": "Only the group admin can delete the group"}), 403
+
+    try:
+        Group.objects(id=access.group_id).delete()
+        group_access.invalidate(access.group_id)
+        # Expenses and the ledger are removed in the background; the job reports progress
+        job = group_deletions.enqueue(access.group_id, requested_by=ObjectId(user_id))
+        return jsonify({"success": True, "message": "Group deleted successfully", "cleanup_job_id": str(job.id)}), 200
+    except Exception as e:
+        return jsonify({"success": False, "message": "Error deleting group", "error": str(e)}), 500
+
+
+@bp.route('/api/groups/deletions/<job_id>', methods=['GET'])
+@require_user
+def get_group_deletion(job_id):
+    job = GroupDeletion.objects(id=to_object_id(job_id), requested_by=ObjectId(g.user_id)).first()
+    if not job:
+        return jsonify({"success": False, "message": "Deletion job not found"}), 404
+    return jsonify({"success": True, "data": job.to_json()}), 200
+
+
+@bp.route('/api/groups/join', methods=['POST'])
+@require_user
+def join_group():
+    data = request.get_json()
+    user = g.user
+    api_key = data.get('api_key')
+
+    if not api_key:
+        return jsonify({"success": False, "message": "Missing required parameters"}), 400
+
+    group_id, passphrase = decode_api_key(api_key)
+
+    if not all([group_id, passphrase]):
+        return jsonify({"success": False, "message": "Missing required parameters"}), 400
+
+    group = Group.objects(id=group_id, passphrase=passphrase).only('id').first()
+    if not group:
+        return jsonify({"success": False, "message": "Invalid group ID or passphrase"}), 404
+
+    if str(user.id) in get_group_access(group.id).member_ids:
+        return jsonify({"success": False, "message": "User already in group"}), 400
+
+    # $addToSet keeps concurrent joins from adding the same member twice
+    Group.objects(id=group.id).update_one(add_to_set__members=user, inc__data_version=1)
+    group_access.invalidate(group.id)
+
+    return jsonify({"success": True, "message": "Joined group successfully"}), 200
+
+
+
+@bp.route('/api/groups/<group_id>/invite', methods=['POST'])
+@require_user
+def invite_user_to_group(group_id):
+    user_id = g.user_id
+
+    # Check if the group exists and the inviter belongs to it
+    access = get_group_access(group_id, user_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    if user_id not in access.member_ids:
+        return jsonify({"success": False, "message": "User is not authorized to invite to this group"}), 403
+
+    group = Group.objects(id=access.group_id).only('groupName', 'passphrase').first()
+
+    # Get email from request
+    data = request.get_json()
+    recipient_email = data.get('email')
+    if not recipient_email:
+        return jsonify({"success": False, "message": "Email is required"}), 400
+
+    # Check if email is already in the group
+    if User.objects(id__in=list(access.member_ids), email=recipient_email).only('id').first():
+        return jsonify({"success": False, "message": "User already in group"}), 400
+
+    # Generate API key
+    api_key = generate_api_key(group_id, group.passphrase)
+
+    # Send an invitation email with API key
+    try:
+        data = {
+            'group_name': group.groupName,
+            'api_key': api_key
+        }
+        send_email(email_purpose='group_invitation',recipient_email=recipient_email, data=data)
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "Failed to send invitation email", "error": str(e)}), 500
+
+    return jsonify({"success": True, "message": "Invitation sent successfully"}), 200
+
+
+@bp.route('/api/groups', methods=['GET'])
+@require_user
+def get_user_groups():
+    user_id = ObjectId(g.user_id)
+
+    try:
+        user_groups = Group.objects.aggregate(user_groups_pipeline(user_id))
+        data = [user_group_json(raw) for raw in user_groups]
+        return jsonify({"success": True, "data": data}), 200
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "Error fetching groups", "error": str(e)}), 500
+
+@bp.route('/api/groups/<group_id>/members', methods=['GET'])
+@require_user
+@conditional_get('group')
+def get_group_members(group_id):
+    user_id = g.user_id
+
+    # Find the group by the group_id
+    access = get_group_access(group_id, user_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    # Optional: Check if the requesting user is authorized (e.g., a member of the group)
+    if user_id not in access.member_ids:
+        return jsonify({"success": False, "message": "Unauthorized access"}), 403
+
+    # Return the list of members, loaded with one query
+    members = User.objects(id__in=list(access.member_ids))
+    member_data = [member.to_json() for member in members]
+    return jsonify({"success": True, "members": member_data}), 200
+
+
+@bp.route('/api/groups/<group_id>/add_expense', methods=['POST'])
+@require_user
+def add_expense_to_group(group_id):
+    user_id = g.user_id
+
+    # Step 2: Validate and extract data
+    data = request.get_json()
+    paid_by = data.get('paid_by')
+    amount = data.get('amount')
+    description = data.get('description')
+    paid_for_ids = data.get('paidFor')
+    split_method = data.get('splitMethod')
+    split_details = data.get('splitDetails')
+
+    # Step 3: Check if group exists and user is a member or admin
+    access = get_group_access(group_id, user_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    if split_method == 'payment':
+        if paid_by in paid_for_ids:
+            return jsonify({"success": False, "message": "Payer cannot be the same as payee in 'payment' split method"}), 400
+
+
+    # Checking if the user is an admin or a member of the group
+    if user_id not in access.member_ids:
+        return jsonify({"success": False, "message": "User is not authorized to add expense to this group"}), 403
+
+    # Payer and paid-for users are resolved with one query
+    payer_id = to_object_id(paid_by)
+    paid_for_user_ids = [to_object_id(paid_for_id) for paid_for_id in paid_for_ids or []]
+    usernames = get_usernames(user_id for user_id in [payer_id] + paid_for_user_ids if user_id)
+    if payer_id not in usernames:
+        return jsonify({"success": False, "message": "Payer not found"}), 400
+    if str(payer_id) not in access.member_ids:
+        return jsonify({"success": False, "message": "Payer must be a member of the group"}), 400
+    if any(paid_for_id not in usernames for paid_for_id in paid_for_user_ids):
+        return jsonify({"success": False, "message": "Paid for user not found"}), 400
+
+    # Every split method is stored as exact owed amounts per member
+    owed, error = normalize_split(split_method, amount, split_details, access.member_ids)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+
+    # Step 4: Create and save expense
+    try:
+        if not ensure_group_ledger(access.group_id):
+            group_access.invalidate(access.group_id)
+            return jsonify({"success": False, "message": "Group not found"}), 404
+        new_expense = GroupExpense(
+            group_id=access.group_id,
+            paidBy=payer_id,
+            amount=amount,
+            description=description,
+            paid_for=paid_for_user_ids,
+            splitMethod=split_method,
+            splitDetails=split_details,
+            owed=owed
+        ).save()
+        update_group_ledger(access.group_id, ledger_deltas(new_expense))
+        if not bump_data_version(Group, access.group_id):
+            # Deleted by another worker during the write, maybe after its cleanup ran
+            new_expense.delete()
+            group_access.invalidate(access.group_id)
+            return jsonify({"success": False, "message": "Group not found"}), 404
+
+        # Prepare data for email
+        expense_mail_data = {
+            "Alert type": "Add",
+            "paid_by": usernames[payer_id],
+            "amount": amount,
+            "description": description,
+            "split_method": split_method,
+        }
+
+        # Get all group members' email addresses, excluding the user who added the expense
+        recipient_emails = get_member_emails(access.member_ids)
+            
+        # Send email to each group member
+        for email in recipient_emails:
+            send_email(email_purpose='expense_alert', recipient_email=email, data=expense_mail_data)
+            
+        return jsonify({"success": True, "message": "Expense added successfully", "data": new_expense.to_json()}), 201
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "Error adding expense", "error": str(e)}), 500
+
+# Most expenses accepted by one batch submission
+MAX_BATCH_EXPENSES = 100
+
+
+@bp.route('/api/groups/<group_id>/add_expenses', methods=['POST'])
+@require_user
+def add_expenses_to_group(group_id):
+    user_id = g.user_id
+
+    access = get_group_access(group_id, user_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    if user_id not in access.member_ids:
+        return jsonify({"success": False, "message": "User is not authorized to add expense to this group"}), 403
+
+    items = (request.get_json() or {}).get('expenses')
+    if not isinstance(items, list) or not items:
+        return jsonify({"success": False, "message": "A non-empty list of expenses is required"}), 400
+    if len(items) > MAX_BATCH_EXPENSES:
+        return jsonify({"success": False, "message": f"At most {MAX_BATCH_EXPENSES} expenses can be added at once"}), 400
+
+    # Resolve every payer and paid-for user of the whole batch with one query
+    referenced_ids = set()
+    for item in items:
+        referenced_ids.add(to_object_id(item.get('paid_by')))
+        referenced_ids.update(to_object_id(paid_for_id) for paid_for_id in item.get('paidFor') or [])
+    users = {user['_id']: user['username'] for user in
+             User.objects(id__in=[user_id for user_id in referenced_ids if user_id]).only('username').as_pymongo()}
+
+    # Validate the whole batch first; nothing is written if any expense is invalid
+    new_expenses = []
+    errors = []
+    for index, item in enumerate(items):
+        paid_by = to_object_id(item.get('paid_by'))
+        paid_for_ids = [to_object_id(paid_for_id) for paid_for_id in item.get('paidFor') or []]
+        split_method = item.get('splitMethod')
+        date = item.get('date') or datetime.utcnow()
+
+        if paid_by not in users:
+            errors.append({"index": index, "message": "Payer not found"})
+            continue
+        if str(paid_by) not in access.member_ids:
+            errors.append({"index": index, "message": "Payer must be a member of the group"})
+            continue
+        if any(paid_for_id not in users for paid_for_id in paid_for_ids):
+            errors.append({"index": index, "message": "Paid for user not found"})
+            continue
+        if split_method == 'payment' and paid_by in paid_for_ids:
+            errors.append({"index": index, "message": "Payer cannot be the same as payee in 'payment' split method"})
+            continue
+        try:
+            if isinstance(date, str):
+                date = datetime.strptime(date, '%Y-%m-%dT%H:%M:%S.%fZ')
+        except ValueError:
+            errors.append({"index": index, "message": "Invalid date format. Use YYYY-MM-DDTHH:MM:SS.sssZ"})
+            continue
+        owed, error = normalize_split(split_method, item.get('amount'), item.get('splitDetails'), access.member_ids)
+        if error:
+            errors.append({"index": index, "message": error})
+            continue
+
+        expense = GroupExpense(
+            group_id=access.group_id,
+            paidBy=paid_by,
+            amount=item.get('amount'),
+            description=item.get('description'),
+            paid_for=paid_for_ids,
+            splitMethod=split_method,
+            splitDetails=item.get('splitDetails'),
+            owed=owed,
+            date=date
+        )
+        try:
+            expense.validate()
+        except ValidationError as e:
+            errors.append({"index": index, "message": str(e)})
+            continue
+        new_expenses.append(expense)
+
+    if errors:
+        return jsonify({"success": False, "message": "Some expenses are invalid", "errors": errors}), 400
+
+    try:
+        # One insert_many and one ledger $inc for the whole batch
+        if not ensure_group_ledger(access.group_id):
+            group_access.invalidate(access.group_id)
+            return jsonify({"success": False, "message": "Group not found"}), 404
+        inserted_ids = GroupExpense.objects.insert(new_expenses, load_bulk=False)
+        batch_deltas = {}
+        for expense, expense_id in zip(new_expenses, inserted_ids):
+            expense.id = expense_id
+            for member_id, cents in ledger_deltas(expense).items():
+                batch_deltas[member_id] = batch_deltas.get(member_id, 0) + cents
+        update_group_ledger(access.group_id, batch_deltas)
+        if not bump_data_version(Group, access.group_id):
+            # Deleted by another worker during the write, maybe after its cleanup ran
+            GroupExpense.objects(id__in=inserted_ids).delete()
+            group_access.invalidate(access.group_id)
+            return jsonify({"success": False, "message": "Group not found"}), 404
+
+        # Each member gets one summary email for the whole batch
+        batch_mail_data = [
+            {
+                "paid_by": users[to_object_id(expense._data['paidBy'])],
+                "amount": expense.amount,
+                "description": expense.description,
+                "split_method": expense.splitMethod
+            }
+            for expense in new_expenses
+        ]
+        for email in get_member_emails(access.member_ids):
+            send_email(email_purpose='expense_batch_alert', recipient_email=email, data=batch_mail_data)
+
+        return jsonify({"success": True, "message": f"{len(new_expenses)} expenses added successfully",
+                        "data": GroupExpense.bulk_to_json(new_expenses)}), 201
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "Error adding expenses", "error": str(e)}), 500
+
+@bp.route('/api/groups/<group_id>/expenses', methods=['GET'])
+@require_user
+@conditional_get('group')
+def get_group_expenses(group_id):
+    user_id = g.user_id
+
+    # Step 2: Check if the group exists
+    access = get_group_access(group_id, user_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    # Step 3: Check if the user is a member or admin of the group
+    if user_id not in access.member_ids:
+        return jsonify({"success": False, "message": "User is not authorized to view expenses of this group"}), 403
+
+    # Step 4: Retrieve and return the expenses
+    try:
+        expenses = GroupExpense.objects(group_id=access.group_id).order_by('-date')  # Order by date descending
+        expenses_json = GroupExpense.bulk_to_json(expenses)
+
+        return jsonify({"success": True, "expenses": expenses_json}), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": "Error retrieving expenses", "error": str(e)}), 500
+
+@bp.route('/api/groups/<group_id>/export', methods=['GET'])
+@require_user
+def export_group_expenses(group_id):
+    user_id = g.user_id
+
+    access = get_group_access(group_id, user_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    if user_id not in access.member_ids:
+        return jsonify({"success": False, "message": "User is not authorized to export expenses of this group"}), 403
+
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({"success": False, "message": "Format must be ndjson or csv"}), 400
+
+    # Usernames of the current members are loaded once; ids of former members
+    # are looked up the first time they appear and cached for the rest of the stream
+    usernames = get_usernames(ObjectId(member_id) for member_id in access.member_ids)
+    looked_up = set(usernames)
+
+    def serialize(row):
+        missing = [user_id for user_id in GroupExpense.raw_user_ids(row) if user_id not in looked_up]
+        if missing:
+            usernames.update(get_usernames(missing))
+            looked_up.update(missing)
+        return GroupExpense.raw_to_json(row, usernames)
+
+    # Exports carry no ETag, so they can read from a secondary and trail the primary slightly
+    rows = (GroupExpense.objects(group_id=access.group_id).using(READ_ALIAS).order_by('date').as_pymongo()
+            .batch_size(EXPORT_BATCH_SIZE))
+    return export_response(rows, serialize, fmt, GROUP_EXPENSE_COLUMNS, f"group_{group_id}_expenses")
+
+@bp.route('/api/groups/<group_id>/edit_expense/<expense_id>', methods=['PUT'])
+@require_user
+def edit_group_expense(group_id, expense_id):
+    user_id = g.user_id
+
+    # Check if group exists and if user is a member
+    access = get_group_access(group_id, user_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    if user_id not in access.member_ids:
+        return jsonify({"success": False, "message": "Unauthorized Action"}), 403
+
+    # Retrieve the expense to be edited
+    expense = GroupExpense.objects(id=expense_id, group_id=access.group_id).first()
+    if not expense:
+        return jsonify({"success": False, "message": "Expense not found"}), 404
+
+    # Update the expense
+    payer_id = to_object_id(expense._data.get('paidBy'))
+    # Rows written before splits were normalized were never applied as exact deltas
+    legacy = not expense.owed
+    old_deltas = ledger_deltas(expense)
+    data = request.get_json()
+    expense.amount = data.get('amount', expense.amount)
+    expense.description = data.get('description', expense.description)
+    expense.splitMethod = data.get('splitMethod', expense.splitMethod)
+    expense.splitDetails = data.get('splitDetails', expense.splitDetails)
+    expense.owed, error = normalize_split(expense.splitMethod, expense.amount, expense.splitDetails,
+                                          access.member_ids)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+    if not ensure_group_ledger(access.group_id):
+        group_access.invalidate(access.group_id)
+        return jsonify({"success": False, "message": "Group not found"}), 404
+    expense.save()
+
+    if legacy:
+        # Its old contribution is not known exactly, so recompute the whole ledger
+        rebuild_group_ledger(access.group_id)
+    else:
+        # Apply only the difference between the old and the new split to the ledger
+        new_deltas = ledger_deltas(expense)
+        update_group_ledger(access.group_id, {member_id: new_deltas.get(member_id, 0) - old_deltas.get(member_id, 0)
+                                              for member_id in set(old_deltas) | set(new_deltas)})
+    bump_data_version(Group, access.group_id)
+
+    # Prepare data for email
+    expense_mail_data = {
+        "Alert type": "Edit",
+        "paid_by": get_usernames([payer_id]).get(payer_id, "Unknown User"),
+        "amount": expense.amount,
+        "description": expense.description,
+        "split_method": expense.splitMethod,
+    }
+
+    # Get all group members' email addresses, excluding the user who added the expense
+    recipient_emails = get_member_emails(access.member_ids)
+        
+    # Send email to each group member
+    for email in recipient_emails:
+        send_email(email_purpose='expense_alert', recipient_email=email, data=expense_mail_data)
+    return jsonify({"success": True, "message": "Expense updated successfully", "data": expense.to_json()}), 200
+
+@bp.route('/api/groups/<group_id>/expenses/<expense_id>', methods=['DELETE'])
+@require_user
+def delete_expense_from_group(group_id, expense_id):
+    user_id = g.user_id
+
+    # Step 2: Check if group exists and user is an admin
+    access = get_group_access(group_id, user_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    if user_id not in access.member_ids:
+        return jsonify({"success": False, "message": "User is not authorized to delete expenses in this group"}), 403
+
+    # Step 3: Attempt to delete the expense
+    try:
+        expense = GroupExpense.objects(id=expense_id, group_id=access.group_id).first()
+        if not expense:
+            return jsonify({"success": False, "message": "Expense not found"}), 404
+        if not ensure_group_ledger(access.group_id):
+            group_access.invalidate(access.group_id)
+            return jsonify({"success": False, "message": "Group not found"}), 404
+        expense.delete()
+        payer_id = to_object_id(expense._data.get('paidBy'))
+        if expense.owed:
+            update_group_ledger(access.group_id, ledger_deltas(expense), sign=-1)
+        else:
+            # Not migrated yet, recompute the ledger from the remaining expenses
+            rebuild_group_ledger(access.group_id)
+        bump_data_version(Group, access.group_id)
+
+        # Prepare data for email
+        expense_mail_data = {
+            "Alert type": "Delete",
+            "paid_by": get_usernames([payer_id]).get(payer_id, "Unknown User"),
+            "amount": expense.amount,
+            "description": expense.description,
+            "split_method": expense.splitMethod,
+        }
+
+        # Get all group members' email addresses, excluding the user who added the expense
+        recipient_emails = get_member_emails(access.member_ids)
+            
+        # Send email to each group member
+        for email in recipient_emails:
+            send_email(email_purpose='expense_alert', recipient_email=email, data=expense_mail_data)
+
+        return jsonify({"success": True, "message": "Expense deleted successfully"}), 200
+    except Exception as e:
+        return jsonify({"success": False, "message": "Error deleting expense", "error": str(e)}), 500
+
+@bp.route('/api/groups/<group_id>/settlement_summary', methods=['GET'])
+@require_user
+@conditional_get('group')
+def get_settlement_summary(group_id):
+    user_id = g.user_id
+
+    # Step 2: Check if the group exists
+    access = get_group_access(group_id, user_id)
+    if not access:
+        return jsonify({"success": False, "message": "Group not found"}), 404
+
+    # Step 3: Check if the user is a member or admin of the group
+    if user_id not in access.member_ids:
+        return jsonify({"success": False, "message": "User is not authorized to view this information"}), 403
+
+    # Step 4: Read the member balances and usernames from the group ledger in one aggregation
+    try:
+        rows = get_group_balance_rows(access.group_id)
+        balances = {row['member_id']: row['cents'] for row in rows}
+        usernames = {row['member_id']: row['username'] for row in rows}
+
+        # Only the transfer matching runs here, optionally searching harder for the fewest transfers
+        fewest_transfers = request.args.get('fewest_transfers', 'false').lower() == 'true'
+        settlements = settle_balances(balances, fewest_transfers=fewest_transfers)
+
+        # Format the settlements for the response
+        settlements_json = [
+            {
+                'from': usernames[debtor],
+                'to': usernames[creditor],
+                'amount': amount / 100
+            }
+            for debtor, creditor, amount in settlements
+        ]
+
+        return jsonify({"success": True, "settlements": settlements_json}), 200
+
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "Error calculating settlements", "error": str(e)}), 500
+
+
+@bp.cli.command('ledger')
+@click.argument('action', type=click.Choice(['verify', 'rebuild']))
+@click.argument('group_id', required=False)
+def ledger_command(action, group_id):
+    # Recompute ledgers from the raw expenses and report drift, optionally fixing it
+    groups = Group.objects(id=group_id) if group_id else Group.objects
+    drifted = 0
+    for group in groups.only('id'):
+        ledger = GroupLedger.objects(group_id=group.id).only('balances').as_pymongo().first()
+        stored = {member_id: cents for member_id, cents in (ledger or {}).get('balances', {}).items() if cents}
+        expected = compute_group_balances(group.id)
+        drift = {member_id: expected.get(member_id, 0) - stored.get(member_id, 0)
+                 for member_id in set(stored) | set(expected)
+                 if expected.get(member_id, 0) != stored.get(member_id, 0)}
+        if ledger is None or drift:
+            drifted += 1
+            print(f"Group {group.id}: {'missing ledger' if ledger is None else 'drift'}")
+            for member_id, cents in drift.items():
+                print(f"  member {member_id}: stored {stored.get(member_id, 0)}, expected {expected.get(member_id, 0)} (cents)")
+        if action == 'rebuild':
+            rebuild_group_ledger(group.id)
+    print(f"{drifted} group ledger(s) out of sync" + (", rebuilt" if action == 'rebuild' else ""))
+
+
+@bp.cli.command('orphans')
+@click.argument('action', type=click.Choice(['verify', 'purge']))
+def orphans_command(action):
+    # Expenses and ledgers of groups deleted before deletion cascaded, or whose job never ran
+    orphaned = find_orphaned_groups()
+    for group_id, count in orphaned.items():
+        print(f"Group {group_id}: {count} orphaned expense(s)")
+    if action == 'purge':
+        for group_id in orphaned:
+            group_deletions.enqueue(group_id)
+        # Runs here, together with any other job that is due
+        group_deletions.drain()
+    print(f"{len(orphaned)} deleted group(s) with leftovers" + (", purged" if action == 'purge' else ""))
+
+
+@bp.cli.command('group-deletions-drain')
+def drain_group_deletions():
+    # Finish every pending or stalled group deletion in this process
+    print(f"Processed {group_deletions.drain()} group deletion job(s)")
+
+
+# Expenses written per bulk_write while migrating splits
+SPLIT_MIGRATION_BATCH_SIZE = 1000
+
+
+@bp.cli.command('splits')
+@click.argument('action', type=click.Choice(['verify', 'migrate']))
+@click.argument('group_id', required=False)
+def splits_command(action, group_id):
+    # Backfill the normalized owed amounts of expenses written before they existed.
+    # Custom splits and shares that do not total 100 now count in full, so the
+    # ledgers of every migrated group are rebuilt afterwards.
+    query = {'owed': {'$exists': False}}
+    if group_id:
+        query['group_id'] = ObjectId(group_id)
+    collection = GroupExpense._get_collection()
+    rows = collection.find(query, {'group_id': 1, 'amount': 1, 'splitMethod': 1, 'splitDetails': 1})
+    pending = 0
+    invalid = 0
+    groups = set()
+    operations = []
+    for row in rows.batch_size(SPLIT_MIGRATION_BATCH_SIZE):
+        pending += 1
+        owed, error = normalize_split(row.get('splitMethod'), row.get('amount'), row.get('splitDetails'), strict=False)
+        if error:
+            invalid += 1
+            print(f"Expense {row['_id']}: {error}")
+            continue
+        groups.add(row['group_id'])
+        if action == 'migrate':
+            operations.append(UpdateOne({'_id': row['_id']}, {'$set': {'owed': owed}}))
+            if len(operations) >= SPLIT_MIGRATION_BATCH_SIZE:
+                collection.bulk_write(operations, ordered=False)
+                operations = []
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+    if action == 'migrate':
+        for migrated_group_id in groups:
+            rebuild_group_ledger(migrated_group_id)
+    print(f"{pending} expense(s) without normalized splits in {len(groups)} group(s), {invalid} invalid"
+          + (", migrated and ledgers rebuilt" if action == 'migrate' else ""))
@@ -0,0 +1,35 @@
+from flask import Blueprint, jsonify
+
+from core.auth import require_ops_token
+from core.mail import outbox
+from database.connection import stats as database_stats
+
+bp = Blueprint('ops', __name__, cli_group=None)
+
+
+@bp.route('/api/outbox/stats', methods=['GET'])
+@require_ops_token
+def get_outbox_stats():
+    try:
+        return jsonify({"success": True, "data": outbox.stats()}), 200
+    except Exception as e:
+        print(str(e))
+        return jsonify({"success": False, "message": "Error fetching outbox stats", "error": str(e)}), 500
+
+
+@bp.route('/api/db/stats', methods=['GET'])
+@require_ops_token
+def get_database_stats():
+    return jsonify({"success": True, "data": database_stats()}), 200
+
+
+@bp.cli.command('outbox-drain')
+def drain_outbox():
+    # Deliver everything that is currently due, useful against a local SMTP stub
+    total = 0
+    while True:
+        processed = outbox.process_batch()
+        if not processed:
+            break
+        total += processed
+    print(f"Processed {total} queued emails")
@@ -0,0 +1,270 @@
+from datetime import datetime
+import base64
+import json
+
+import click
+import mongoengine as db
+from bson import ObjectId
+from flask import Blueprint, request, jsonify, Response, stream_with_context, g
+
+from core.auth import require_user
+from core.models import User, PersonalExpense, ExpenseRollup, bump_data_version
+from core.rollups import (rollup_deltas, merge_rollup_deltas, update_expense_rollups, compute_expense_rollups,
+                          rebuild_expense_rollups)
+from database.connection import READ_ALIAS
+from exports.stream import generate_export, PERSONAL_EXPENSE_COLUMNS
+from imports.parsers import iter_csv_rows, iter_ofx_rows, ofx_fields
+from imports.validation import validate_personal_expense
+from serialization.json_response import fast_jsonify
+
+bp = Blueprint('personal', __name__, cli_group=None)
+
+
+@bp.route('/api/personal_expenses/add', methods=['POST'])
+@require_user
+def add_expense():
+    user = g.user
+
+    fields, error = validate_personal_expense(request.get_json())
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+
+    new_expense = PersonalExpense(user_id=user, **fields).save()
+    update_expense_rollups(user.id, rollup_deltas([new_expense]))
+    bump_data_version(User, user.id)
+    return jsonify({"success": True, "message": "Expense added successfully", "data": new_expense.to_json()}), 201
+
+
+# Rows written per insert_many, and how many row errors are listed in the response
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_REPORTED_ERRORS = 200
+
+
+@bp.route('/api/personal_expenses/import', methods=['POST'])
+@require_user
+def import_expenses():
+    user = g.user
+
+    upload = request.files.get('file')
+    if not upload:
+        return jsonify({"success": False, "message": "A CSV or OFX file is required"}), 400
+
+    fmt = request.form.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+    if fmt not in ['csv', 'ofx', 'qfx']:
+        return jsonify({"success": False, "message": "Format must be csv or ofx"}), 400
+    default_category = request.form.get('category')
+
+    if fmt == 'csv':
+        rows = iter_csv_rows(upload.stream)
+    else:
+        rows = ((number, ofx_fields(transaction)) for number, transaction in iter_ofx_rows(upload.stream))
+
+    imported = 0
+    skipped = 0
+    errors = []
+    error_count = 0
+    batch = []
+
+    def flush():
+        # load_bulk=False: one insert_many round trip, no documents read back
+        PersonalExpense.objects.insert(batch, load_bulk=False)
+        update_expense_rollups(user.id, rollup_deltas(batch))
+        return len(batch)
+
+    try:
+        for row_number, row in rows:
+            if row.pop('credit', False):
+                # Income in a bank statement is not an expense
+                skipped += 1
+                continue
+            row['category'] = row.get('category') or default_category
+            fields, error = validate_personal_expense(row)
+            if error:
+                error_count += 1
+                if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                    errors.append({"row": row_number, "message": error})
+                continue
+            batch.append(PersonalExpense(user_id=user, **fields))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                imported += flush()
+                batch = []
+        if batch:
+            imported += flush()
+    except Exception as e:
+        # Batches already written stay imported; report how far we got
+        print(str(e))
+        if imported:
+            bump_data_version(User, user.id)
+        return jsonify({"success": False, "message": "Error importing expenses", "error": str(e),
+                        "imported": imported, "skipped": skipped, "error_count": error_count, "errors": errors}), 500
+
+    if imported:
+        bump_data_version(User, user.id)
+    return jsonify({
+        "success": True,
+        "message": "Expenses imported",
+        "imported": imported,
+        "skipped": skipped,
+        "error_count": error_count,
+        "errors": errors
+    }), 200
+
+# Page size limits for the personal expense listing
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(date, expense_id):
+    # Opaque continuation token holding the (date, _id) of the last row on a page
+    payload = json.dumps({"date": date.isoformat(), "id": str(expense_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    return datetime.fromisoformat(payload["date"]), ObjectId(payload["id"])
+
+
+@bp.route('/api/personal_expenses', methods=['GET'])
+@require_user
+def get_expenses():
+    user = g.user
+
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"success": False, "message": "Limit must be a number"}), 400
+
+    # Newest first, ties on date broken by _id so every row has a stable position
+    expenses = PersonalExpense.objects(user_id=user).order_by('-date', 'id').only(*PersonalExpense.LIST_FIELDS).as_pymongo()
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            last_date, last_id = decode_cursor(cursor)
+        except Exception:
+            return jsonify({"success": False, "message": "Invalid cursor"}), 400
+        expenses = expenses.filter(db.Q(date__lt=last_date) | db.Q(date=last_date, id__gt=last_id))
+
+    # Fetch one extra row to know whether another page exists
+    page = list(expenses.limit(limit + 1))
+    next_cursor = encode_cursor(page[limit - 1]['date'], page[limit - 1]['_id']) if len(page) > limit else None
+    return fast_jsonify({
+        "success": True,
+        "expenses": [PersonalExpense.raw_to_json(raw) for raw in page[:limit]],
+        "next_cursor": next_cursor
+    })
+
+# Rows fetched from Mongo per cursor batch while exporting
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def export_response(rows, serialize, fmt, columns, filename):
+    # Streams the export with chunked transfer, optionally gzip-compressed
+    compress = request.args.get('gzip', 'false').lower() == 'true'
+    headers = {"Content-Disposition": f"attachment; filename={filename}.{fmt}"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return Response(
+        stream_with_context(generate_export(rows, serialize, fmt=fmt, columns=columns, compress=compress)),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers=headers
+    )
+
+
+@bp.route('/api/personal_expenses/export', methods=['GET'])
+@require_user
+def export_expenses():
+    user = g.user
+
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({"success": False, "message": "Format must be ndjson or csv"}), 400
+
+    # Raw documents straight from the cursor, nothing is materialized. Exports carry
+    # no ETag, so they can read from a secondary and trail the primary slightly.
+    rows = (PersonalExpense.objects(user_id=user).using(READ_ALIAS).order_by('date').as_pymongo()
+            .batch_size(EXPORT_BATCH_SIZE))
+    return export_response(rows, PersonalExpense.raw_to_json, fmt, PERSONAL_EXPENSE_COLUMNS, "expenses")
+
+@bp.route('/api/personal_expenses/delete/<expense_id>', methods=['DELETE'])
+@require_user
+def delete_expense(expense_id):
+    user_id = g.user_id
+
+    # Check if the expense belongs to the user
+    expense = PersonalExpense.objects(id=expense_id, user_id=user_id).first()
+    if not expense:
+        return jsonify({"success": False, "message": "Expense not found or does not belong to the user"}), 404
+
+    try:
+        # Delete the found expense
+        expense.delete()
+        update_expense_rollups(user_id, rollup_deltas([expense], sign=-1))
+        bump_data_version(User, user_id)
+        return jsonify({"success": True, "message": "Expense deleted successfully"}), 200
+    except Exception as e:
+        # Handle any exceptions that occur during delete
+        return jsonify({"success": False, "message": "An error occurred while trying to delete the expense"}), 500
+
+
+@bp.route('/api/personal_expenses/edit/<expense_id>', methods=['PUT'])
+@require_user
+def edit_expense(expense_id):
+    user_id = g.user_id
+
+    expense = PersonalExpense.objects(id=expense_id, user_id=user_id).first()
+    if not expense:
+        return jsonify({"success": False, "message": "Expense not found or does not belong to the user"}), 404
+
+    data = request.get_json()
+    amount = data.get('amount')
+    name = data.get('name')
+    date = data.get('date', datetime.utcnow())
+
+    if not amount or not name:
+        return jsonify({"success": False, "message": "Amount and name are required"}), 400
+
+    try:
+        if isinstance(date, str):
+            date = datetime.strptime(date, '%Y-%m-%dT%H:%M:%S.%fZ')
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid date format. Use YYYY-MM-DDTHH:MM:SS.sssZ"}), 400
+
+    try:
+        # Update the expense
+        expense.update(amount=amount, name=name, date=date)
+        # Moves the expense between months when the date changed
+        old_deltas = rollup_deltas([expense], sign=-1)
+        expense.amount, expense.date = amount, date
+        update_expense_rollups(user_id, merge_rollup_deltas(old_deltas, rollup_deltas([expense])))
+        bump_data_version(User, user_id)
+        return jsonify({"success": True, "message": "Expense updated successfully"}), 200
+    except Exception as e:
+        # Handle any exceptions that occur during update
+        return jsonify({"success": False, "message": "An error occurred while trying to update the expense"}), 500
+
+
+@bp.cli.command('rollups')
+@click.argument('action', type=click.Choice(['verify', 'rebuild']))
+@click.argument('user_id', required=False)
+def rollups_command(action, user_id):
+    # Backfill or check the monthly expense rollups against the raw expenses
+    users = User.objects(id=user_id) if user_id else User.objects
+    drifted = 0
+    for user in users.only('id'):
+        stored = {(row['month'], row['category']): [row['count'], row['total_cents']]
+                  for row in ExpenseRollup.objects(user_id=user.id).as_pymongo()
+                  if row['count'] or row['total_cents']}
+        expected = compute_expense_rollups(user.id)
+        if stored != expected:
+            drifted += 1
+            print(f"User {user.id}: rollups out of sync")
+            for key in sorted(set(stored) | set(expected)):
+                if stored.get(key) != expected.get(key):
+                    print(f"  {key[0]} {key[1]}: stored {stored.get(key)}, expected {expected.get(key)} ([count, cents])")
+        if action == 'rebuild':
+            rebuild_expense_rollups(user.id)
+    print(f"{drifted} user(s) with out of sync rollups" + (", rebuilt" if action == 'rebuild' else ""))
+
+#dashboard section
@@ -0,0 +1,59 @@
+import threading
+from collections import namedtuple
+
+from caching.ttl_cache import TTLCache
+
+
+# Membership of one group as plain id strings, the admin included in member_ids
+GroupAccess = namedtuple('GroupAccess', ['group_id', 'admin_id', 'member_ids', 'version'])
+
+
+class GroupAccessCache:
+    # load_group(group_id) must return the raw group document (admin and members
+    # as ObjectIds, never dereferenced) or None when the group does not exist.
+    def __init__(self, load_group, maxsize=5000, ttl=60):
+        self.load_group = load_group
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Bumped by every invalidation. One counter for all groups keeps this bounded;
+        # a load only misses being cached if some group changed while it ran.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, group_id, user_id=None):
+        access = self._cache.get(group_id)
+        # A cached entry that denies the user is re-read once, so someone who
+        # just joined through another worker is not locked out until the TTL ends
+        if access is not None and (user_id is None or user_id in access.member_ids):
+            return access
+        return self._load(group_id)
+
+    def _load(self, group_id):
+        version = self._generation
+        raw = self.load_group(group_id)
+        if raw is None:
+            return None
+        admin_id = str(raw['admin'])
+        access = GroupAccess(
+            group_id=group_id,
+            admin_id=admin_id,
+            member_ids=frozenset([admin_id] + [str(member_id) for member_id in raw.get('members', [])]),
+            version=version
+        )
+        # Skip caching if a group was invalidated while we were reading it
+        with self._lock:
+            if self._generation == version:
+                self._cache.set(group_id, access)
+        return access
+
+    def invalidate(self, group_id):
+        # Call after any change to the group's admin or members, or its deletion.
+        # Only reaches this process; writes confirm the group still exists themselves.
+        with self._lock:
+            self._generation += 1
+            self._cache.pop(group_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
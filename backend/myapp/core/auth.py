@@ -0,0 +1,171 @@
+from datetime import datetime
+from functools import wraps
+import hashlib
+import hmac
+import os
+
+import jwt
+from flask import current_app, request, jsonify, Response, g
+from jwt import ExpiredSignatureError, DecodeError
+from werkzeug.local import LocalProxy
+
+from caching.ttl_cache import TTLCache
+from core.groups import get_group_access
+from core.models import User, Group, get_data_version
+from passwords.hashing import PasswordHasher
+
+# The hasher belongs to the app; its bcrypt threads only start on the first hash,
+# so a pool built in a preloading gunicorn master is never shared with the workers
+password_hasher = LocalProxy(lambda: current_app.extensions['password_hasher'])
+
+
+def init_app(app):
+    # bcrypt runs on a bounded pool; raising BCRYPT_ROUNDS upgrades old hashes on next login
+    app.config.setdefault("BCRYPT_ROUNDS", int(os.getenv("BCRYPT_ROUNDS", 12)))
+    app.config.setdefault("HASH_WORKERS", int(os.getenv("HASH_WORKERS", os.cpu_count() or 2)))
+    app.config.setdefault("HASH_QUEUE_SIZE", int(os.getenv("HASH_QUEUE_SIZE", 8)))
+    app.config.setdefault("HASH_TIMEOUT", float(os.getenv("HASH_TIMEOUT", 10)))
+    # Bearer token of the stats endpoints and /metrics; unset disables them
+    app.config.setdefault("OPS_TOKEN", os.getenv("OPS_TOKEN"))
+    app.extensions['password_hasher'] = PasswordHasher(
+        rounds=app.config["BCRYPT_ROUNDS"],
+        workers=app.config["HASH_WORKERS"],
+        queue_size=app.config["HASH_QUEUE_SIZE"],
+        timeout=app.config["HASH_TIMEOUT"]
+    )
+
+
+def hashing_overloaded_response(error):
+    response = jsonify({"success": False, "message": "Server is busy, please try again shortly"})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+
+# Verified tokens and loaded users are cached per worker. Entries are short-lived
+# and dropped on writes to the user, so other workers see a change within the TTL.
+token_cache = TTLCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", 10000)), ttl=int(os.getenv("TOKEN_CACHE_TTL", 300)))
+user_cache = TTLCache(maxsize=int(os.getenv("USER_CACHE_SIZE", 5000)), ttl=int(os.getenv("USER_CACHE_TTL", 30)))
+
+
+def get_user_id_from_token(token, secret_key):
+    # The key is passed in because the native ASGI routes run without a Flask app context
+    if token.startswith('Bearer '):
+        # Removing the 'Bearer ' prefix
+        token = token[7:]
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+    try:
+        decoded_token = jwt.decode(token, secret_key, algorithms=["HS256"])
+    except (ExpiredSignatureError, DecodeError) as e:
+        print(f"Token error: {e}")
+        return None
+
+    # Never keep a token in the cache past its own expiry
+    ttl = token_cache.ttl
+    if "exp" in decoded_token:
+        ttl = min(ttl, decoded_token["exp"] - datetime.utcnow().timestamp())
+    if ttl > 0:
+        token_cache.set(token, decoded_token["user_id"], ttl=ttl)
+    return decoded_token["user_id"]
+
+
+def load_user(user_id):
+    user = user_cache.get(user_id)
+    if user is None:
+        user = User.objects(id=user_id).first()
+        if user is not None:
+            user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id):
+    # Call after any write to a user document
+    user_id = str(user_id)
+    user_cache.pop(user_id)
+    token_cache.discard_where(lambda cached_user_id: cached_user_id == user_id)
+
+
+def require_user(view):
+    # Authenticates the request and exposes the user as g.user / g.user_id
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('Authorization')
+        if not token:
+            return jsonify({"success": False, "message": "Authentication token is missing"}), 401
+
+        user_id = get_user_id_from_token(token, current_app.config['SECRET_KEY'])
+        if not user_id:
+            return jsonify({"success": False, "message": "Invalid or expired token"}), 401
+
+        user = load_user(user_id)
+        if not user:
+            return jsonify({"success": False, "message": "User not found"}), 404
+
+        g.user_id = user_id
+        g.user = user
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def require_ops_token(view):
+    # For the stats endpoints and /metrics, which expose internals and are called by
+    # monitoring rather than users: they need the OPS_TOKEN bearer token, not a login
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get('OPS_TOKEN')
+        if not expected:
+            return jsonify({"success": False, "message": "Not found"}), 404
+
+        token = request.headers.get('Authorization', '')
+        if token.startswith('Bearer '):
+            token = token[7:]
+        if not hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8')):
+            return jsonify({"success": False, "message": "Invalid ops token"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def conditional_get(scope):
+    # ETag keyed on the data version of the current user (scope 'user') or of the
+    # <group_id> route argument (scope 'group'). A matching If-None-Match gets a 304
+    # after one version lookup, before the view queries any expenses. The version is
+    # read from the primary, so the view must read its body there too: a lagging
+    # secondary would return stale data under a fresh ETag and clients would keep it.
+    # READ_ALIAS is for routes without an ETag.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if scope == 'group':
+                access = get_group_access(kwargs['group_id'], g.user_id)
+                if access is None or g.user_id not in access.member_ids:
+                    # Let the view answer with its own 404 / 403
+                    return view(*args, **kwargs)
+                doc_id, version = access.group_id, get_data_version(Group, access.group_id)
+            else:
+                doc_id, version = g.user_id, get_data_version(User, g.user_id)
+            if version is None:
+                return view(*args, **kwargs)
+
+            # The month is part of the key because month-to-date figures roll over without a write
+            variant = hashlib.sha1(f"{request.full_path}|{datetime.utcnow():%Y-%m}".encode()).hexdigest()[:12]
+            etag = f"{scope}-{doc_id}-{version}-{variant}"
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                if scope == 'user' and g.user.data_version != version:
+                    # The view reads g.user, cached per worker; another worker changed the
+                    # user since. Reload it and tag the body with the version it came from.
+                    user_cache.pop(g.user_id)
+                    g.user = load_user(g.user_id)
+                    if g.user is None:
+                        return jsonify({"success": False, "message": "User not found"}), 404
+                    etag = f"{scope}-{doc_id}-{g.user.data_version}-{variant}"
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
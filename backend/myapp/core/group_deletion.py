@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import mongoengine as db
+
+from core.models import Group, GroupExpense, GroupLedger
+
+
+# One document per deleted group. The group itself is removed right away; its
+# expenses and ledger are removed here in small batches, and the progress
+# survives a crash because the job is just picked up again once its lease ends.
+class GroupDeletion(db.Document):
+    group_id = db.ObjectIdField(required=True)
+    requested_by = db.ObjectIdField()
+    status = db.StringField(default='pending', choices=['pending', 'running', 'done', 'failed'])
+    # Expenses that existed when the job first ran, and how many are gone since
+    total = db.IntField()
+    deleted = db.IntField(default=0)
+    batches = db.IntField(default=0)
+    attempts = db.IntField(default=0)
+    locked_until = db.DateTimeField()
+    created_at = db.DateTimeField(default=datetime.utcnow)
+    updated_at = db.DateTimeField()
+    finished_at = db.DateTimeField()
+    last_error = db.StringField()
+
+    meta = {
+        'collection': 'group_deletions',
+        'indexes': [
+            ('status', 'created_at'),
+            'group_id',
+            # Finished jobs are kept for a week so their progress can still be looked up
+            {'fields': ['finished_at'], 'expireAfterSeconds': 7 * 24 * 3600}
+        ]
+    }
+
+    def to_json(self):
+        return {
+            "job_id": str(self.id),
+            "group_id": str(self.group_id),
+            "status": self.status,
+            "total": self.total,
+            "deleted": self.deleted,
+            "progress": round(min(self.deleted / self.total, 1), 4) if self.total else (1 if self.status == 'done' else 0),
+            "created_at": self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            "finished_at": self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None,
+            "last_error": self.last_error
+        }
+
+
+class GroupDeletionWorker:
+    def __init__(self, app=None):
+        self.app = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('GROUP_DELETE_BATCH_SIZE', int(os.getenv("GROUP_DELETE_BATCH_SIZE", 1000)))
+        # Pause between batches so a large group never hogs the primary
+        app.config.setdefault('GROUP_DELETE_PAUSE_SECONDS', float(os.getenv("GROUP_DELETE_PAUSE_SECONDS", 0.05)))
+        app.config.setdefault('GROUP_DELETE_LEASE_SECONDS', 120)
+        app.config.setdefault('GROUP_DELETE_POLL_SECONDS', 30)
+        app.config.setdefault('GROUP_DELETE_MAX_ATTEMPTS', 5)
+        app.config.setdefault('GROUP_DELETE_WORKER', True)
+        app.extensions['group_deletions'] = self
+        # Started by the first request of every worker, so jobs left by a crashed one are resumed
+        app.before_request(self._ensure_worker)
+
+    def enqueue(self, group_id, requested_by=None):
+        # A group already being cleaned up keeps its existing job
+        job = GroupDeletion.objects(group_id=group_id, status__in=['pending', 'running']).first()
+        if job is None:
+            job = GroupDeletion(group_id=group_id, requested_by=requested_by).save()
+        self._wake.set()
+        return job
+
+    def _ensure_worker(self):
+        if not self.app.config['GROUP_DELETE_WORKER']:
+            return
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='group-deletion', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                processed = self.process_next()
+            except Exception as e:
+                print(f"Group deletion worker error: {e}")
+                processed = False
+            if not processed:
+                self._wake.wait(self.app.config['GROUP_DELETE_POLL_SECONDS'])
+                self._wake.clear()
+
+    def _lease(self):
+        return datetime.utcnow() + timedelta(seconds=self.app.config['GROUP_DELETE_LEASE_SECONDS'])
+
+    def _claim(self):
+        # Jobs stuck in 'running' past their lease belong to a worker that died
+        now = datetime.utcnow()
+        due = db.Q(status='pending') | db.Q(status='running', locked_until__lte=now)
+        return GroupDeletion.objects(due).order_by('created_at').modify(
+            set__status='running', set__locked_until=self._lease(), inc__attempts=1, new=True)
+
+    def process_next(self):
+        job = self._claim()
+        if job is None:
+            return False
+        try:
+            self.run_job(job)
+        except Exception as e:
+            print(f"Failed to delete expenses of group {job.group_id} (attempt {job.attempts}): {e}")
+            if job.attempts >= self.app.config['GROUP_DELETE_MAX_ATTEMPTS']:
+                job.update(set__status='failed', set__last_error=str(e), set__finished_at=datetime.utcnow(),
+                           unset__locked_until=True)
+            else:
+                # Retried by whichever worker claims it after the lease runs out
+                job.update(set__last_error=str(e))
+        return True
+
+    def run_job(self, job):
+        expenses = GroupExpense._get_collection()
+        if job.total is None:
+            job.total = expenses.count_documents({'group_id': job.group_id})
+            job.update(set__total=job.total)
+
+        batch_size = self.app.config['GROUP_DELETE_BATCH_SIZE']
+        while True:
+            # Each batch is one index range read of ids and one delete_many over exactly
+            # those ids, so no single write holds locks for long. Whatever is left after
+            # a crash still matches the group, which is all a resumed job needs.
+            ids = [row['_id'] for row in expenses.find({'group_id': job.group_id}, {'_id': 1}).limit(batch_size)]
+            if not ids:
+                break
+            deleted = expenses.delete_many({'_id': {'$in': ids}}).deleted_count
+            job.deleted += deleted
+            job.update(inc__deleted=deleted, inc__batches=1, set__locked_until=self._lease(),
+                       set__updated_at=datetime.utcnow())
+            time.sleep(self.app.config['GROUP_DELETE_PAUSE_SECONDS'])
+
+        GroupLedger._get_collection().delete_many({'group_id': job.group_id})
+        now = datetime.utcnow()
+        job.update(set__status='done', set__finished_at=now, set__updated_at=now, unset__locked_until=True,
+                   unset__last_error=True)
+        job.status = 'done'
+
+    def drain(self):
+        # Run every due job in this process, for the CLI
+        processed = 0
+        while self.process_next():
+            processed += 1
+        return processed
+
+
+group_deletions = GroupDeletionWorker()
+
+
+def find_orphaned_groups():
+    # group_id -> orphaned expense count, for expenses and ledgers whose group no longer exists
+    orphaned = {}
+    for document, count in [(GroupExpense, {'$sum': 1}), (GroupLedger, {'$sum': 0})]:
+        rows = document._get_collection().aggregate([
+            {'$group': {'_id': '$group_id', 'count': count}},
+            {'$lookup': {'from': Group._get_collection_name(), 'localField': '_id', 'foreignField': '_id',
+                         'as': 'group'}},
+            {'$match': {'group': {'$size': 0}}},
+            {'$project': {'count': 1}}
+        ], allowDiskUse=True)
+        for row in rows:
+            orphaned[row['_id']] = orphaned.get(row['_id'], 0) + row['count']
+    return orphaned
@@ -0,0 +1,65 @@
+import os
+import base64
+
+from caching.group_acl import GroupAccessCache
+from core.models import Group, GroupExpense, to_object_id
+
+
+def load_group_acl(group_id):
+    # admin and members come back as raw ObjectIds, no User is dereferenced
+    return Group.objects(id=group_id).only('admin', 'members').as_pymongo().first()
+
+
+group_access = GroupAccessCache(load_group_acl, maxsize=int(os.getenv("GROUP_ACL_CACHE_SIZE", 5000)),
+                                ttl=int(os.getenv("GROUP_ACL_CACHE_TTL", 60)))
+
+
+def get_group_access(group_id, user_id=None):
+    # Cached membership of a group, or None if the id is invalid or the group is gone
+    group_id = to_object_id(group_id)
+    if group_id is None:
+        return None
+    return group_access.get(group_id, user_id)
+
+
+def generate_api_key(group_id, passphrase):
+    combined_key = f"{group_id}:{passphrase}"
+    encoded_key = base64.urlsafe_b64encode(combined_key.encode()).decode()
+    return encoded_key
+
+
+def decode_api_key(api_key):
+    decoded_key = base64.urlsafe_b64decode(api_key).decode()
+    group_id, passphrase = decoded_key.split(':', 1)
+    return group_id, passphrase
+
+
+def user_groups_pipeline(user_id):
+    # One $or query (served by the admin and members indexes) returns each group
+    # once; expense count and last activity are joined in the same pipeline
+    return [
+        {'$match': {'$or': [{'admin': user_id}, {'members': user_id}]}},
+        {'$project': {'groupName': 1, 'admin': 1, 'members': 1, 'date_created': 1, 'passphrase': 1}},
+        {'$lookup': {
+            'from': GroupExpense._get_collection_name(),
+            'let': {'group_id': '$_id'},
+            'pipeline': [
+                {'$match': {'$expr': {'$eq': ['$group_id', '$$group_id']}}},
+                {'$group': {'_id': None, 'count': {'$sum': 1}, 'last_date': {'$max': '$date'}}}
+            ],
+            'as': 'expense_stats'
+        }},
+        {'$sort': {'date_created': 1}}
+    ]
+
+
+def user_group_json(raw):
+    group_json = Group.raw_to_json(raw)
+    stats = raw['expense_stats'][0] if raw['expense_stats'] else {'count': 0, 'last_date': None}
+    last_activity = max(filter(None, [raw['date_created'], stats['last_date']]))
+    group_json.update({
+        "member_count": len(set(group_json['members']) | {group_json['admin']}),
+        "expense_count": stats['count'],
+        "last_activity": last_activity.strftime('%Y-%m-%d %H:%M:%S')
+    })
+    return group_json
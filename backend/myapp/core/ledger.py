@@ -0,0 +1,136 @@
+from datetime import datetime
+
+from pymongo.errors import DuplicateKeyError
+
+from core.models import User, Group, GroupExpense, GroupLedger, to_object_id
+from core.splits import normalize_split
+
+
+def ledger_deltas(expense):
+    # Per-member balance deltas (cents) an expense contributes to its group ledger:
+    # the payer is down the amount, every member up what they owe
+    owed = expense.owed
+    if not owed:
+        # Written before splits were normalized and not migrated yet
+        owed = normalize_split(expense.splitMethod, expense.amount, expense.splitDetails, strict=False)[0] or []
+    deltas = {}
+    for entry in owed:
+        member_id = str(entry['member_id'])
+        deltas[member_id] = deltas.get(member_id, 0) + entry['owed_cents']
+    payer_id = str(to_object_id(expense._data.get('paidBy')))
+    deltas[payer_id] = deltas.get(payer_id, 0) - sum(entry['owed_cents'] for entry in owed)
+    return {member_id: cents for member_id, cents in deltas.items() if cents}
+
+
+def group_exists(group_id):
+    # The membership cache can outlive a group deleted by another worker, so writes check this
+    return bool(Group._get_collection().count_documents({"_id": to_object_id(group_id)}, limit=1))
+
+
+def ensure_group_ledger(group_id):
+    # Call before writing a group's expenses; returns False if the group is gone and
+    # nothing may be written. A group without a ledger (created before the ledger
+    # existed, or never written to) gets one built from its expenses so far.
+    # $setOnInsert keeps the first ledger when two writers race to build it, and since
+    # it exists before either writes, both of their $inc land on it.
+    group_id = to_object_id(group_id)
+    if not group_exists(group_id):
+        return False
+    collection = GroupLedger._get_collection()
+    if collection.count_documents({"group_id": group_id}, limit=1):
+        return True
+    balances = compute_group_balances(group_id)
+    try:
+        collection.update_one(
+            {"group_id": group_id},
+            {"$setOnInsert": {"balances": balances, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass
+    return True
+
+
+def update_group_ledger(group_id, deltas, sign=1):
+    # A single $inc on one document, so concurrent writers never lose updates. It never
+    # upserts: a ledger holding only this delta would hide the group's earlier history.
+    increments = {f"balances.{member_id}": sign * cents for member_id, cents in deltas.items() if cents}
+    if not increments:
+        return
+    result = GroupLedger._get_collection().update_one(
+        {"group_id": to_object_id(group_id)},
+        {"$inc": increments, "$set": {"updated_at": datetime.utcnow()}}
+    )
+    if not result.matched_count:
+        # The ledger went missing after ensure_group_ledger; the expenses already include this write
+        ensure_group_ledger(group_id)
+
+
+def group_balances_pipeline(group_id):
+    # Sums every expense's normalized split inside Mongo: each member is up what
+    # they owe and the payer is down the amount. One row per member comes back.
+    return [
+        {'$match': {'group_id': group_id, 'owed': {'$exists': True}}},
+        {'$facet': {
+            'owed': [
+                {'$unwind': '$owed'},
+                {'$group': {'_id': '$owed.member_id', 'cents': {'$sum': '$owed.owed_cents'}}}
+            ],
+            'paid': [
+                {'$group': {'_id': '$paidBy', 'cents': {'$sum': {'$subtract': [0, {'$sum': '$owed.owed_cents'}]}}}}
+            ]
+        }},
+        {'$project': {'rows': {'$concatArrays': ['$owed', '$paid']}}},
+        {'$unwind': '$rows'},
+        {'$group': {'_id': '$rows._id', 'cents': {'$sum': '$rows.cents'}}},
+        {'$match': {'cents': {'$ne': 0}}}
+    ]
+
+
+def compute_group_balances(group_id):
+    # Recompute balances from the raw expenses, used to build and verify the ledger
+    group_id = to_object_id(group_id)
+    balances = {str(row['_id']): row['cents']
+                for row in GroupExpense._get_collection().aggregate(group_balances_pipeline(group_id))}
+    # Expenses written before splits were normalized, none once `splits migrate` has run
+    for expense in GroupExpense.objects(group_id=group_id, __raw__={'owed': {'$exists': False}}).no_dereference():
+        for member_id, cents in ledger_deltas(expense).items():
+            balances[member_id] = balances.get(member_id, 0) + cents
+    return {member_id: cents for member_id, cents in balances.items() if cents}
+
+
+def rebuild_group_ledger(group_id):
+    balances = compute_group_balances(group_id)
+    # A deleted group's ledger is left for its deletion job, never created again
+    GroupLedger._get_collection().update_one(
+        {"group_id": to_object_id(group_id)},
+        {"$set": {"balances": balances, "updated_at": datetime.utcnow()}},
+        upsert=group_exists(group_id)
+    )
+    return balances
+
+
+def ledger_rows_pipeline(group_id):
+    # One row per member with a non-zero balance, with the username joined in
+    return [
+        {'$match': {'group_id': group_id}},
+        {'$project': {'_id': 0, 'balance': {'$objectToArray': '$balances'}}},
+        {'$unwind': '$balance'},
+        {'$match': {'balance.v': {'$ne': 0}}},
+        {'$addFields': {'member_id': {'$toObjectId': '$balance.k'}}},
+        {'$lookup': {'from': User._get_collection_name(), 'localField': 'member_id', 'foreignField': '_id',
+                     'as': 'user'}},
+        {'$project': {'member_id': '$balance.k', 'cents': '$balance.v',
+                      'username': {'$ifNull': [{'$arrayElemAt': ['$user.username', 0]}, "Unknown User"]}}}
+    ]
+
+
+def get_group_balance_rows(group_id):
+    # [{member_id, cents, username}] for a group from its ledger, in one round trip
+    group_id = to_object_id(group_id)
+    rows = list(GroupLedger._get_collection().aggregate(ledger_rows_pipeline(group_id)))
+    if not rows and not GroupLedger.objects(group_id=group_id).count():
+        # Groups created before the ledger existed are built on first use
+        ensure_group_ledger(group_id)
+        rows = list(GroupLedger._get_collection().aggregate(ledger_rows_pipeline(group_id)))
+    return rows
@@ -0,0 +1,114 @@
+import os
+
+from flask_mail import Mail
+
+from notifications.outbox import EmailOutbox
+
+# Neither opens a connection here: Flask-Mail connects per outbox batch and the
+# outbox starts its delivery thread on the first request of each worker process
+mail = Mail()
+outbox = EmailOutbox()
+
+
+def init_app(app):
+    # Mail settings can be overridden to point at a local SMTP stub,
+    # e.g. MAIL_SERVER=127.0.0.1 MAIL_PORT=1025 MAIL_USE_SSL=false
+    app.config.setdefault("MAIL_SERVER", os.getenv("MAIL_SERVER", "smtp.fastmail.com"))
+    app.config.setdefault("MAIL_PORT", int(os.getenv("MAIL_PORT", 465)))
+    app.config.setdefault("MAIL_USERNAME", os.getenv("MAIL_USERNAME", "abhigupta@fastmail.com"))
+    app.config.setdefault("MAIL_PASSWORD", os.getenv("MAIL_PASSWORD"))
+    app.config.setdefault("MAIL_USE_TLS", os.getenv("MAIL_USE_TLS", "false").lower() == "true")
+    app.config.setdefault("MAIL_USE_SSL", os.getenv("MAIL_USE_SSL", "true").lower() == "true")
+    mail.init_app(app)
+    # Emails are queued in Mongo and delivered by a background worker
+    outbox.init_app(app, mail)
+
+
+def send_email(email_purpose,  recipient_email,user_name=None ,data= None):
+    sender_email = 'abhigupta@fastmail.com'
+    # Base HTML structure
+    base_html = """
+    <html>
+        <head>
+            <style>
+                body {{
+                    font-family: Arial, sans-serif;
+                    margin: 0;
+                    padding: 0;
+                    background-color: linear-gradient(to right, #e2e2e2, #7e9af6);
+                    color: #333333;
+                }}
+                .header {{
+                    background-color: #512da8;
+                    color: white;
+                    text-align: center;
+                    padding: 10px 0;
+                }}
+                .content {{
+                    padding: 20px;
+                }}
+                .footer {{
+                    background-color: #512da8;
+                    color: white;
+                    text-align: center;
+                    padding: 10px 0;
+                    font-size: 12px;
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="header">
+                <h1>Expense Monitoring System</h1>
+            </div>
+            <div class="content">
+                {content}
+            </div>
+            <div class="footer">
+                <p>ExpenseMonitoringSystem.com</p>
+                <p>Copyright © 2023 ExpenseMonitoringSystem™.<br>
+                All rights reserved.<br>
+                Boston, MA, 02135</p>
+            </div>
+        </body>
+    </html>
+    """
+
+    if email_purpose == 'registration':
+        subject = 'Welcome to Expense Monitoring System!'
+        content = f"<p>Hello {user_name},</p><p>Welcome to our Expense Management System! Your account has been created successfully.</p>"
+    
+    elif email_purpose == 'group_invitation':
+        subject = 'You have been invited to a group!'
+        content = f"""
+        <p>Hello {user_name},</p>
+        <p>You have been invited to join a group in Expense Monitoring System. 
+        Use the API key below to join the group: <strong>{data['group_name']}</strong></p>
+        <p><strong>API Key: {data['api_key']}</strong></p>
+        <p>Follow the instructions on our website to use this key and join group to manage expenses efficiently.</p>
+        """    
+    elif email_purpose == 'expense_batch_alert':
+        subject = 'New Expenses in Your Group'
+        items = "".join(
+            f"<li>{expense['description']}: {expense['amount']} paid by {expense['paid_by']} ({expense['split_method']} split)</li>"
+            for expense in data
+        )
+        content = f"<p>Hello,</p><p>{len(data)} new expenses were added to your expense group.</p><ul>{items}</ul><p>Please check your Expense Monitoring System account for more details.</p>"
+    elif email_purpose == 'expense_alert':
+        subject = 'Expense Alert in Your Group'
+        content = f"<p>Hello,</p><p>There's a new update in your expense group.</p><p> {data} </p><p>Please check your Expense Monitoring System account for more details.</p>"
+
+    else:
+        subject = 'Notification from Expense Monitoring System'
+        content = "<p>Hello, you have a new notification from Expense Monitoring System.</p>"
+
+    # Create the HTML content
+    html_content = base_html.format(content=content)
+
+    # Queue the message, the outbox worker delivers it in the background
+    outbox.enqueue(
+        subject,
+        sender=sender_email,
+        recipients=[recipient_email],
+        body=content.replace('<p>', '').replace('</p>', '\n').strip(),  # Plain text version
+        html=html_content
+    )
@@ -0,0 +1,278 @@
+from datetime import datetime
+import random
+import string
+
+import mongoengine as db
+from bson import ObjectId, DBRef
+from bson.errors import InvalidId
+
+
+# User Model
+class User(db.Document):
+    username = db.StringField(required=True, unique=True)
+    password = db.StringField(required=True)
+    first_name = db.StringField(required=True)
+    last_name = db.StringField(required=True)
+    email = db.EmailField(required=True, unique=True)
+    budget = db.FloatField(required=False, default=1000.00)
+    # Bumped by every write to the user or their personal expenses, used for ETags
+    data_version = db.IntField(default=0)
+    # Set once expense_rollups hold all of the user's expenses; users from before the
+    # rollups get them built on their first dashboard read
+    rollups_built = db.BooleanField(default=False)
+    
+    def to_json(self):
+        return {
+            "user_id": str(self.id),
+            "username": self.username,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "email": self.email,
+            "budget": self.budget
+        }
+    
+class PersonalExpense(db.Document):
+    user_id = db.ReferenceField(User, required=True)
+    amount = db.FloatField(required=True)
+    name = db.StringField(required=True)
+    date = db.DateTimeField(default=datetime.utcnow)
+    category = db.StringField(required=True)
+
+    meta = {
+        'indexes': [
+            # Serves the keyset-paginated listing: one bounded index scan per page
+            ('user_id', '-date', 'id')
+        ]
+    }
+
+    def to_json(self):
+        return {
+            "expense_id": str(self.id),
+            "user_id": str(self.user_id.id),
+            "amount": self.amount,
+            "name": self.name,
+            "date": self.date.strftime('%Y-%m-%d'),
+            "category": self.category
+        }
+
+    # Fields raw_to_json needs, for .only() on list queries
+    LIST_FIELDS = ('id', 'user_id', 'amount', 'name', 'date', 'category')
+
+    @staticmethod
+    def raw_to_json(raw):
+        # Same shape as to_json, from a raw pymongo document; list routes use this
+        # with as_pymongo() to skip document construction and reference handling
+        return {
+            "expense_id": str(raw['_id']),
+            "user_id": str(raw['user_id']),
+            "amount": raw['amount'],
+            "name": raw['name'],
+            "date": raw['date'].strftime('%Y-%m-%d'),
+            "category": raw['category']
+        }
+
+    
+class Group(db.Document):
+    groupName = db.StringField(required=True)
+    admin = db.ReferenceField(User, required=True)
+    members = db.ListField(db.ReferenceField(User), default=[])
+    date_created = db.DateTimeField(default=datetime.utcnow)
+    passphrase = db.StringField(required=True, unique=True)
+    # Bumped by every write to the group, its members or its expenses, used for ETags
+    data_version = db.IntField(default=0)
+
+    meta = {
+        'indexes': [
+            'admin',
+            'members'
+        ]
+    }
+
+    def generate_passphrase(self, length=16):
+        # Generate a random string of letters and digits
+        letters_and_digits = string.ascii_letters + string.digits
+        return ''.join(random.choice(letters_and_digits) for i in range(length))
+
+    def save(self, *args, **kwargs):
+        if not self.passphrase:
+            self.passphrase = self.generate_passphrase()
+        return super(Group, self).save(*args, **kwargs)
+
+    def is_admin(self, user):
+        return user == self.admin
+
+    @property
+    def all_members(self):
+        return list(set(self.members + [self.admin]))
+    
+    def to_json(self):
+        return {
+            "group_id": str(self.id),
+            "group_name": self.groupName,
+            "admin": str(self.admin.id),
+            "members": [str(member.id) for member in self.members],
+            "date_created": self.date_created.strftime('%Y-%m-%d %H:%M:%S'),
+            "passphrase": self.passphrase
+        }
+
+    @staticmethod
+    def raw_to_json(raw):
+        # Same shape as to_json, from a raw pymongo document with ObjectId references
+        return {
+            "group_id": str(raw['_id']),
+            "group_name": raw['groupName'],
+            "admin": str(raw['admin']),
+            "members": [str(member_id) for member_id in raw.get('members', [])],
+            "date_created": raw['date_created'].strftime('%Y-%m-%d %H:%M:%S'),
+            "passphrase": raw['passphrase']
+        }
+    
+class GroupExpense(db.Document):
+    group_id = db.ReferenceField(Group, required=True)
+    paidBy = db.ReferenceField(User, required=True)  # User who paid the expense
+    amount = db.FloatField(required=True)
+    description = db.StringField(required=True)
+    paid_for = db.ListField(db.ReferenceField(User))  # Description of what the expense was for
+    splitMethod = db.StringField(required=True, choices=['equal', 'percentage', 'custom', 'payment'])
+    splitDetails = db.DictField()  # Details of how the expense is split among members
+    # splitDetails normalized at write time: [{member_id, owed_cents}] for every split
+    # method, adding up to exactly the amount. Balances are computed from this.
+    owed = db.ListField(db.DictField())
+    date = db.DateTimeField(default=datetime.utcnow)  # Date and time of the expense
+
+    meta = {
+        'indexes': [
+            # Listing a group's expenses newest first, and per-group counts in /api/groups
+            ('group_id', '-date'),
+            # Everything a member owes across groups
+            'owed.member_id'
+        ]
+    }
+
+    @staticmethod
+    def raw_user_ids(raw):
+        # Every user a raw pymongo document (or a document's _data) references, as ObjectIds
+        split_details = raw.get('splitDetails') or {}
+        user_ids = [to_object_id(raw.get('paidBy')), to_object_id(split_details.get('payer'))]
+        user_ids += [to_object_id(user) for user in raw.get('paid_for') or []]
+        user_ids += [to_object_id(user_id) for user_id in split_details.get('shares', {})]
+        return [user_id for user_id in user_ids if user_id is not None]
+
+    def referenced_user_ids(self):
+        # Raw references from _data, so nothing gets dereferenced here
+        return GroupExpense.raw_user_ids(self._data)
+
+    @classmethod
+    def bulk_to_json(cls, expenses):
+        # Resolve every user referenced by the whole result set with a single query
+        expenses = list(expenses)
+        usernames = get_usernames(user_id for expense in expenses for user_id in expense.referenced_user_ids())
+        return [expense.to_json(usernames) for expense in expenses]
+
+    @staticmethod
+    def raw_to_json(raw, usernames):
+        # Same shape as to_json, from a raw pymongo document; usernames maps user ids to usernames
+
+        # Helper function to safely get a username from a user ID
+        def get_username_from_id(user_or_id):
+            return usernames.get(to_object_id(user_or_id), "Unknown User")
+
+        # Get usernames for the paid_for field
+        paid_for_usernames = [usernames[user_id] for user_id in map(to_object_id, raw.get('paid_for') or [])
+                              if user_id in usernames]
+
+        # Construct the split details with usernames
+        split_details = raw.get('splitDetails') or {}
+        split_details_with_usernames = {
+            'payer': get_username_from_id(split_details.get('payer')),
+            'shares': {get_username_from_id(user_id): share for user_id, share in split_details.get('shares', {}).items()}
+        }
+
+        return {
+            "group_expense_id": str(raw['_id']),
+            "group_id": str(to_object_id(raw.get('group_id'))),
+            "paid_by": get_username_from_id(raw.get('paidBy')),
+            "amount": raw.get('amount'),
+            "description": raw.get('description'),
+            "paid_for": paid_for_usernames,
+            "split_method": raw.get('splitMethod'),
+            "split_details": split_details_with_usernames,
+            "date": raw['date'].strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def to_json(self, usernames=None):
+        if usernames is None:
+            usernames = get_usernames(self.referenced_user_ids())
+
+        try:
+            return GroupExpense.raw_to_json({**self._data, '_id': self.id}, usernames)
+        except Exception as e:
+            print(f"Error in to_json: {e}")
+            raise
+
+
+class GroupLedger(db.Document):
+    group_id = db.ReferenceField(Group, required=True, unique=True)
+    # member id -> net balance in cents; positive means the member owes money
+    balances = db.DictField()
+    updated_at = db.DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'group_ledger'
+    }
+
+
+class ExpenseRollup(db.Document):
+    # Count and total of a user's personal expenses per month and category,
+    # kept current by $inc on every personal expense write
+    user_id = db.ReferenceField(User, required=True)
+    month = db.StringField(required=True)  # YYYY-MM
+    category = db.StringField(required=True)
+    count = db.IntField(default=0)
+    total_cents = db.IntField(default=0)
+
+    meta = {
+        'collection': 'expense_rollups',
+        'indexes': [
+            {'fields': ['user_id', 'month', 'category'], 'unique': True}
+        ]
+    }
+
+
+def to_object_id(user_or_id):
+    # Accepts a document, a DBRef, an ObjectId, a string or an {'$oid': ...} dict
+    if isinstance(user_or_id, (db.Document, DBRef)):
+        return user_or_id.id
+    if isinstance(user_or_id, dict) and '$oid' in user_or_id:
+        user_or_id = user_or_id['$oid']
+    if isinstance(user_or_id, str):
+        try:
+            return ObjectId(user_or_id)
+        except InvalidId:
+            return None
+    if isinstance(user_or_id, ObjectId):
+        return user_or_id
+    return None
+
+
+def get_usernames(user_ids):
+    # Build an id -> username map with one $in query
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    return {user['_id']: user['username'] for user in User.objects(id__in=user_ids).only('username').as_pymongo()}
+
+
+def bump_data_version(document, doc_id):
+    # Any cached response for this user or group stops matching its ETag.
+    # Returns 0 when the document no longer exists.
+    return document.objects(id=doc_id).update_one(inc__data_version=1)
+
+
+def get_data_version(document, doc_id):
+    raw = document._get_collection().find_one({'_id': ObjectId(doc_id)}, {'data_version': 1})
+    return None if raw is None else raw.get('data_version', 0)
+
+
+def get_member_emails(member_ids):
+    return [user['email'] for user in User.objects(id__in=[ObjectId(member_id) for member_id in member_ids]).only('email').as_pymongo()]
@@ -0,0 +1,89 @@
+from pymongo import UpdateOne, DeleteOne
+
+from bill_settlement.bill_settle import to_cents
+from core.models import User, PersonalExpense, ExpenseRollup, to_object_id
+
+
+def rollup_deltas(expenses, sign=1):
+    # (month, category) -> [count, cents] for expense-like objects with date, category and amount
+    deltas = {}
+    for expense in expenses:
+        delta = deltas.setdefault((expense.date.strftime('%Y-%m'), expense.category), [0, 0])
+        delta[0] += sign
+        delta[1] += sign * to_cents(expense.amount)
+    return deltas
+
+
+def merge_rollup_deltas(*deltas_list):
+    merged = {}
+    for deltas in deltas_list:
+        for key, (count, cents) in deltas.items():
+            delta = merged.setdefault(key, [0, 0])
+            delta[0] += count
+            delta[1] += cents
+    return merged
+
+
+def update_expense_rollups(user_id, deltas):
+    # One upserting $inc per touched (month, category), all in one bulk_write
+    user_id = to_object_id(user_id)
+    operations = [
+        UpdateOne({'user_id': user_id, 'month': month, 'category': category},
+                  {'$inc': {'count': count, 'total_cents': cents}}, upsert=True)
+        for (month, category), (count, cents) in deltas.items() if count or cents
+    ]
+    if operations:
+        ExpenseRollup._get_collection().bulk_write(operations, ordered=False)
+
+
+def compute_expense_rollups(user_id):
+    # Recompute a user's rollups from the raw expenses, rounding each amount to cents like to_cents
+    rows = PersonalExpense.objects(user_id=user_id).aggregate([
+        {'$group': {
+            '_id': {'month': {'$dateToString': {'format': '%Y-%m', 'date': '$date'}}, 'category': '$category'},
+            'count': {'$sum': 1},
+            'total_cents': {'$sum': {'$round': [{'$multiply': ['$amount', 100]}, 0]}}
+        }}
+    ])
+    return {(row['_id']['month'], row['_id']['category']): [row['count'], int(row['total_cents'])] for row in rows}
+
+
+def rebuild_expense_rollups(user_id):
+    # Computes the rollups first and swaps them in with one bulk_write. Rows are set in
+    # place rather than deleted and reinserted, so an $inc from a concurrent write always
+    # finds its row; stale rows are only removed if nothing touched them since they were read.
+    user_id = to_object_id(user_id)
+    stored = list(ExpenseRollup._get_collection().find({'user_id': user_id}))
+    rollups = compute_expense_rollups(user_id)
+    operations = [
+        UpdateOne({'user_id': user_id, 'month': month, 'category': category},
+                  {'$set': {'count': count, 'total_cents': cents}}, upsert=True)
+        for (month, category), (count, cents) in rollups.items()
+    ]
+    operations += [
+        DeleteOne({'_id': row['_id'], 'count': row['count'], 'total_cents': row['total_cents']})
+        for row in stored if (row['month'], row['category']) not in rollups
+    ]
+    if operations:
+        ExpenseRollup._get_collection().bulk_write(operations, ordered=False)
+    User.objects(id=user_id).update(set__rollups_built=True)
+    return rollups
+
+
+def ensure_expense_rollups(user):
+    # Call before reading a user's rollups. Writes $inc them from the start, so rows
+    # existing is no sign they are complete; until rollups_built is set they are rebuilt.
+    if user.rollups_built or User.objects(id=user.id, rollups_built=True).count():
+        user.rollups_built = True
+        return
+    rebuild_expense_rollups(user.id)
+    user.rollups_built = True
+
+
+def get_month_rollups(user_id, months):
+    # month -> {category: (count, cents)} for the given YYYY-MM months, a single indexed query
+    result = {month: {} for month in months}
+    for row in ExpenseRollup.objects(user_id=user_id, month__in=list(months)).as_pymongo():
+        if row['count']:
+            result[row['month']][row['category']] = (row['count'], row['total_cents'])
+    return result
@@ -0,0 +1,48 @@
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from bill_settlement.bill_settle import to_cents, split_cents
+
+# Shares are percentages for every split method (the frontend converts custom
+# amounts too). Client-side rounding can leave them slightly off 100.
+SHARE_TOTAL_TOLERANCE = 0.05
+
+
+def normalize_split(split_method, amount, split_details, member_ids=None, strict=True):
+    # Validates the shares of a group expense and turns them into
+    # [{member_id, owed_cents}] entries that add up to exactly the amount.
+    # Returns (owed, error). strict=False rescales shares that do not total
+    # 100, for expenses written before this was checked.
+    try:
+        amount_cents = to_cents(amount)
+    except (TypeError, ValueError):
+        return None, "Amount must be a number"
+    if amount_cents <= 0:
+        return None, "Amount must be greater than zero"
+
+    shares = split_details.get('shares') if isinstance(split_details, dict) else None
+    if not isinstance(shares, dict) or not shares:
+        return None, "Split details must include shares"
+
+    weights = {}
+    for member_id, share in shares.items():
+        try:
+            member_id = ObjectId(str(member_id))
+        except InvalidId:
+            return None, f"Invalid member id in shares: {member_id}"
+        if member_ids is not None and str(member_id) not in member_ids:
+            return None, "Shares can only include members of the group"
+        if isinstance(share, bool) or not isinstance(share, (int, float)) or share < 0:
+            return None, "Shares must be non-negative numbers"
+        weights[member_id] = weights.get(member_id, 0) + share
+
+    total = sum(weights.values())
+    if total <= 0:
+        return None, "Shares must add up to 100"
+    if strict and abs(total - 100) > SHARE_TOTAL_TOLERANCE:
+        return None, "Shares must add up to 100"
+    if split_method == 'payment' and len(weights) != 1:
+        return None, "A payment must have exactly one payee"
+
+    return [{"member_id": member_id, "owed_cents": cents}
+            for member_id, cents in split_cents(amount_cents, weights).items() if cents], None
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+
+import certifi
+import mongoengine as db
+from mongoengine.connection import disconnect_all
+from pymongo import ReadPreference, monitoring
+
+from monitoring.latency import LatencyWindow
+
+# Read-heavy routes query through this alias, which prefers secondaries.
+# Secondaries can lag a little, so it is only used where slightly stale data is fine.
+READ_ALIAS = 'read_secondary'
+
+_lock = threading.Lock()
+_connected = False
+pool_stats = {}
+
+
+def mongo_uri():
+    # DB_URI overrides everything, e.g. mongodb://127.0.0.1:27017/expenses for a local mongod.
+    # PASSWORD and DBNAME are the names app.py used to read and are still accepted.
+    uri = os.getenv("DB_URI")
+    if uri:
+        return uri
+    user = os.getenv("DB_USER", "abgupta")
+    password = os.getenv("DB_PASSWORD", os.getenv("PASSWORD"))
+    host = os.getenv("DB_HOST", "cluster0.u08th6y.mongodb.net")
+    name = os.getenv("DB_NAME", os.getenv("DBNAME"))
+    return "mongodb+srv://{}:{}@{}/{}?retryWrites=true&w=majority".format(user, password, host, name)
+
+
+def client_options(uri=None):
+    uri = uri or mongo_uri()
+    options = {
+        'maxPoolSize': int(os.getenv("DB_MAX_POOL_SIZE", 50)),
+        'minPoolSize': int(os.getenv("DB_MIN_POOL_SIZE", 0)),
+        'connectTimeoutMS': int(os.getenv("DB_CONNECT_TIMEOUT_MS", 5000)),
+        'socketTimeoutMS': int(os.getenv("DB_SOCKET_TIMEOUT_MS", 30000)),
+        'serverSelectionTimeoutMS': int(os.getenv("DB_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+        # How long a request may wait for a free pooled connection before failing
+        'waitQueueTimeoutMS': int(os.getenv("DB_WAIT_QUEUE_TIMEOUT_MS", 2000))
+    }
+    if uri.startswith('mongodb+srv://'):
+        options['tlsCAFile'] = certifi.where()
+    return options
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    # Checkout wait is the time between asking the pool for a connection and
+    # getting one; it grows when maxPoolSize is too small for the load
+    def __init__(self):
+        self._local = threading.local()
+        self._wait = LatencyWindow()
+        self.checked_out = 0
+        self.checked_in = 0
+        self.checkout_failed = 0
+        self.created = 0
+        self.closed = 0
+        self.cleared = 0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, 'started', None)
+        if started is not None:
+            self._wait.add((time.perf_counter() - started) * 1000)
+            self._local.started = None
+        self.checked_out += 1
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        self.checkout_failed += 1
+
+    def connection_checked_in(self, event):
+        self.checked_in += 1
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.closed += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self):
+        return {
+            "in_use": self.checked_out - self.checked_in,
+            "open": self.created - self.closed,
+            "checkouts": self.checked_out,
+            "checkout_failed": self.checkout_failed,
+            "pool_cleared": self.cleared,
+            "checkout_wait_ms": self._wait.summary()
+        }
+
+
+def register_pool_stats(name):
+    listener = PoolStats()
+    pool_stats[name] = listener
+    return listener
+
+
+def _register_connections():
+    uri = mongo_uri()
+    options = client_options(uri)
+    # Only the settings are stored here; mongoengine builds each MongoClient on its
+    # first query, and connect=False defers opening sockets until then as well
+    db.register_connection(db.DEFAULT_CONNECTION_NAME, host=uri, connect=False,
+                           event_listeners=[register_pool_stats(db.DEFAULT_CONNECTION_NAME)], **options)
+    db.register_connection(READ_ALIAS, host=uri, connect=False, read_preference=ReadPreference.SECONDARY_PREFERRED,
+                           event_listeners=[register_pool_stats(READ_ALIAS)], **options)
+
+
+def init_db():
+    # Called on first use in each process (the app does it when an app context is
+    # pushed). Parsing a mongodb+srv URI resolves DNS, so this is kept out of import.
+    global _connected
+    if _connected:
+        return
+    with _lock:
+        if not _connected:
+            _register_connections()
+            _connected = True
+
+
+def _reset_after_fork():
+    # A gunicorn --preload master may have connected already; each forked worker
+    # drops the inherited clients and registers its own on first use
+    global _connected
+    if _connected:
+        disconnect_all()
+        pool_stats.clear()
+        _connected = False
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def stats():
+    return {name: listener.stats() for name, listener in pool_stats.items()}
@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import resource
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from core.models import PersonalExpense
+from exports.stream import generate_export, PERSONAL_EXPENSE_COLUMNS
+
+
+def current_rss_mb():
+    # Resident set size right now (Linux), falling back to the peak elsewhere
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def synthetic_rows(count):
+    # Raw documents shaped like PersonalExpense.as_pymongo(), generated lazily like a cursor
+    user_id = ObjectId()
+    start = datetime(2020, 1, 1)
+    categories = ["Food", "Travel", "Shopping", "Bills", "Health"]
+    for i in range(count):
+        yield {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "amount": round(1 + (i * 7.31) % 500, 2),
+            "name": f"Expense {i}",
+            "date": start + timedelta(minutes=i),
+            "category": categories[i % len(categories)]
+        }
+
+
+def run_streaming(count, fmt, compress):
+    baseline = current_rss_mb()
+    samples = []
+    written = 0
+    started = time.perf_counter()
+    stream = generate_export(synthetic_rows(count), PersonalExpense.raw_to_json, fmt=fmt,
+                             columns=PERSONAL_EXPENSE_COLUMNS, compress=compress)
+    for index, chunk in enumerate(stream):
+        written += len(chunk)
+        if index % 200 == 0:
+            samples.append(current_rss_mb())
+    elapsed = time.perf_counter() - started
+    print(f"streaming {fmt}{' gzip' if compress else ''}: {count} rows, {written / 2 ** 20:.1f} MB out, "
+          f"{elapsed:.1f}s, RSS baseline {baseline:.1f} MB, max {max(samples):.1f} MB, last {samples[-1]:.1f} MB")
+
+
+def run_materialized(count):
+    # What get_all_expenses does today: a full list plus one serialized string
+    baseline = current_rss_mb()
+    started = time.perf_counter()
+    body = json.dumps({"success": True, "expenses": [PersonalExpense.raw_to_json(row) for row in synthetic_rows(count)]})
+    elapsed = time.perf_counter() - started
+    print(f"materialized json: {count} rows, {len(body) / 2 ** 20:.1f} MB out, {elapsed:.1f}s, "
+          f"RSS baseline {baseline:.1f} MB, after {current_rss_mb():.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory of the streaming expense export")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--materialize", action="store_true", help="also measure the list-and-jsonify approach")
+    args = parser.parse_args()
+
+    run_streaming(args.rows, 'ndjson', compress=False)
+    run_streaming(args.rows, 'csv', compress=True)
+    if args.materialize:
+        run_materialized(args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+import zlib
+
+
+# Rows are buffered and flushed in chunks so the response is not written row by row
+CHUNK_ROWS = 500
+
+# Rows are serialized by PersonalExpense.raw_to_json and GroupExpense.raw_to_json,
+# so an export has the same fields as the API
+PERSONAL_EXPENSE_COLUMNS = ["expense_id", "user_id", "amount", "name", "date", "category"]
+GROUP_EXPENSE_COLUMNS = ["group_expense_id", "group_id", "paid_by", "amount", "description",
+                         "paid_for", "split_method", "split_details", "date"]
+
+
+def generate_export(rows, serialize, fmt='ndjson', columns=None, compress=False):
+    # Yields encoded chunks; only one chunk of rows is ever held in memory
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # 31 = gzip container
+
+    for chunk in _text_chunks(rows, serialize, fmt, columns):
+        data = chunk.encode('utf-8')
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def _text_chunks(rows, serialize, fmt, columns):
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+
+    count = 0
+    for row in rows:
+        record = serialize(row)
+        if writer:
+            # Nested values (shares, paid_for) become JSON inside the cell
+            writer.writerow({key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                             for key, value in record.items()})
+        else:
+            buffer.write(json.dumps(record))
+            buffer.write('\n')
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,15 @@
+# gunicorn --chdir backend/myapp -c gunicorn.conf.py app:app
+import os
+
+from prometheus_client import multiprocess
+
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+# The app is imported once in the master and forked; it opens no Mongo or SMTP
+# connections at import, so every worker still builds its own clients
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live samples from the shared metrics directory
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
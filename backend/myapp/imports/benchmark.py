@@ -0,0 +1,56 @@
+import argparse
+import io
+import time
+from datetime import datetime, timedelta
+
+from imports.parsers import iter_csv_rows, iter_ofx_rows, ofx_fields
+from imports.validation import validate_personal_expense
+
+
+CATEGORIES = ["Food", "Travel", "Shopping", "Bills", "Health"]
+
+
+def make_csv(rows):
+    lines = ["Date,Description,Amount,Category"]
+    start = datetime(2023, 1, 1)
+    for i in range(rows):
+        date = (start + timedelta(hours=i)).strftime('%Y-%m-%d')
+        lines.append(f"{date},Card payment {i},-{1 + i % 300}.{i % 100:02d},{CATEGORIES[i % len(CATEGORIES)]}")
+    return "\n".join(lines).encode()
+
+
+def make_ofx(rows):
+    parts = ["OFXHEADER:100\nDATA:OFXSGML\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>"]
+    start = datetime(2023, 1, 1)
+    for i in range(rows):
+        date = (start + timedelta(hours=i)).strftime('%Y%m%d%H%M%S')
+        parts.append(f"<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>{date}\n<TRNAMT>-{1 + i % 300}.{i % 100:02d}\n"
+                     f"<FITID>{i}\n<NAME>Card payment {i}\n</STMTTRN>\n")
+    parts.append("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>")
+    return "".join(parts).encode()
+
+
+def measure(label, rows, payload):
+    # Parse and validate only; the insert_many round trips depend on the database
+    started = time.perf_counter()
+    valid = 0
+    for _, fields in rows(io.BytesIO(payload)):
+        fields.pop('credit', None)
+        fields['category'] = fields.get('category') or 'Other'
+        if validate_personal_expense(fields)[1] is None:
+            valid += 1
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {valid} valid rows in {elapsed:.2f}s, {valid / elapsed:,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the personal expense import parsers")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    measure("csv", iter_csv_rows, make_csv(args.rows))
+    measure("ofx", lambda stream: ((n, ofx_fields(t)) for n, t in iter_ofx_rows(stream)), make_ofx(args.rows))
+
+
+if __name__ == '__main__':
+    main()
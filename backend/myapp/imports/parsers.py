@@ -0,0 +1,97 @@
+import csv
+import io
+import re
+from datetime import datetime
+
+
+# Header aliases accepted in uploaded CSV files, compared case-insensitively
+CSV_COLUMNS = {
+    'name': ['name', 'description', 'payee', 'memo'],
+    'amount': ['amount', 'debit', 'value'],
+    'date': ['date', 'posted', 'transaction date'],
+    'category': ['category']
+}
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+OFX_READ_SIZE = 64 * 1024
+
+
+def _to_number(value):
+    try:
+        return float(str(value).replace(',', '').strip())
+    except ValueError:
+        return value
+
+
+def iter_csv_rows(stream):
+    # Yields (row_number, fields) lazily; the upload is never read into memory at once
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    headers = {header.strip().lower(): header for header in reader.fieldnames or []}
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        columns[field] = next((headers[alias] for alias in aliases if alias in headers), None)
+
+    for row_number, row in enumerate(reader, start=2):  # row 1 is the header
+        fields = {field: (row.get(column) or '').strip() if column else None for field, column in columns.items()}
+        if fields['amount']:
+            # Bank exports usually write debits as negative numbers
+            amount = _to_number(fields['amount'])
+            fields['amount'] = abs(amount) if isinstance(amount, float) else amount
+        if fields['date'] and re.fullmatch(r'\d{4}-\d{2}-\d{2}', fields['date']):
+            fields['date'] = datetime.strptime(fields['date'], '%Y-%m-%d')
+        yield row_number, fields
+
+
+def _ofx_tags(stream):
+    # Tokenizes SGML or XML OFX in fixed-size reads, carrying a partial tag between reads
+    text = io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+    pending = ''
+    while True:
+        chunk = text.read(OFX_READ_SIZE)
+        data = pending + chunk
+        cut = data.rfind('<') if chunk else len(data)
+        if cut < 0:
+            # Text outside any tag carries no data
+            pending = ''
+            continue
+        for match in OFX_TAG.finditer(data, 0, cut):
+            yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+        pending = data[cut:]
+        if not chunk:
+            break
+
+
+def _ofx_date(value):
+    # OFX dates look like 20240131 or 20240131120000[-5:EST]
+    return datetime.strptime(value[:8], '%Y%m%d')
+
+
+def iter_ofx_rows(stream):
+    # Yields one (transaction_number, fields) per STMTTRN block; credits are yielded
+    # with a positive 'credit' flag so the caller can skip income
+    transaction = None
+    count = 0
+    for closing, tag, value in _ofx_tags(stream):
+        if tag == 'STMTTRN' and not closing:
+            transaction = {}
+        elif tag == 'STMTTRN' and closing and transaction is not None:
+            count += 1
+            yield count, transaction
+            transaction = None
+        elif transaction is not None and not closing and value:
+            transaction[tag] = value
+
+
+def ofx_fields(transaction):
+    amount = _to_number(transaction.get('TRNAMT', ''))
+    try:
+        date = _ofx_date(transaction.get('DTPOSTED', ''))
+    except ValueError:
+        date = transaction.get('DTPOSTED')
+    return {
+        'name': transaction.get('NAME') or transaction.get('MEMO'),
+        'amount': abs(amount) if isinstance(amount, float) else amount,
+        'date': date,
+        'category': None,
+        'credit': isinstance(amount, float) and amount > 0
+    }
@@ -0,0 +1,33 @@
+from datetime import datetime
+import math
+
+
+def validate_personal_expense(data):
+    # Shared by add_expense and the bulk import; returns (fields, error message)
+    amount = data.get('amount')
+    name = data.get('name')
+    date = data.get('date') or datetime.utcnow()
+    category = data.get('category')
+
+    if not category:
+        return None, "Category is required"
+
+    if not amount or not name:
+        return None, "Amount and name are required"
+
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        return None, "Amount must be a number"
+    if not math.isfinite(amount):
+        # NaN, inf and values like 1e400 cannot be stored as cents
+        return None, "Amount must be a finite number"
+
+    try:
+        if isinstance(date, str):
+            # Updated to parse ISO 8601 format date string
+            date = datetime.strptime(date, '%Y-%m-%dT%H:%M:%S.%fZ')
+    except ValueError:
+        return None, "Invalid date format. Use YYYY-MM-DDTHH:MM:SS.sssZ"
+
+    return {"amount": amount, "name": name, "date": date, "category": category}, None
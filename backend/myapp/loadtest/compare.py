@@ -0,0 +1,85 @@
+import argparse
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Read routes served natively by asgi.py, plus one that falls through to Flask
+DEFAULT_PATHS = [
+    "/api/personal_expenses",
+    "/api/personal_expenses?limit=10",
+    "/api/dashboard/get_all_expenses",
+    "/api/dashboard/get_expenses?start=2024-01-01&end=2024-12-31",
+    "/api/groups",
+    "/api/users/profile"
+]
+
+
+def fetch(base_url, path, token):
+    request = urllib.request.Request(base_url + path, headers={"Authorization": f"Bearer {token}"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def check_contract(flask_url, asgi_url, paths, token):
+    # Both deployments must answer every path with the same status and body
+    mismatches = 0
+    for path in paths:
+        expected = fetch(flask_url, path, token)
+        actual = fetch(asgi_url, path, token)
+        same = expected == actual
+        mismatches += not same
+        print(f"{'ok  ' if same else 'DIFF'} {path} flask={expected[0]} asgi={actual[0]}")
+    # Auth failures have to match as well
+    for path in paths[:1]:
+        for bad_token in ["", "not-a-token"]:
+            same = fetch(flask_url, path, bad_token) == fetch(asgi_url, path, bad_token)
+            mismatches += not same
+            print(f"{'ok  ' if same else 'DIFF'} {path} with token {bad_token!r}")
+    return mismatches
+
+
+def run_load(base_url, paths, token, total, concurrency):
+    def one(index):
+        started = time.perf_counter()
+        status, _ = fetch(base_url, paths[index % len(paths)], token)
+        return (time.perf_counter() - started) * 1000, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status >= 500)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{base_url}: {total} requests, concurrency {concurrency}, {total / elapsed:.0f} req/s, "
+          f"p50 {p50:.1f} ms, p99 {p99:.1f} ms, {errors} server errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Flask and ASGI deployments of the API")
+    parser.add_argument("--flask", default="http://127.0.0.1:8000", help="gunicorn app:app")
+    parser.add_argument("--asgi", default="http://127.0.0.1:8001", help="uvicorn asgi:app")
+    parser.add_argument("--token", required=True, help="JWT of a user with some expenses and groups")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--path", action="append", dest="paths", help="override the default paths")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    mismatches = check_contract(args.flask, args.asgi, paths, args.token)
+    if mismatches:
+        print(f"{mismatches} responses differ, skipping the load test")
+        raise SystemExit(1)
+
+    run_load(args.flask, paths, args.token, args.requests, args.concurrency)
+    run_load(args.asgi, paths, args.token, args.requests, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,8 @@
 import mongoengine as db
-import certifi
-import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-
-password = os.getenv("DB_PASSWORD")
-
-
-dataBase_name = os.getenv("DB_NAME")
-
-DB_URI = "mongodb+srv://abgupta:{}@cluster0.u08th6y.mongodb.net/{}?retryWrites=true&w=majority".format(password, dataBase_name)
-
-db.connect(host=DB_URI, tlsCAFile=certifi.where())
-
 class User(db.Document):
     username = db.StringField(required=True, unique=True)
     password = db.StringField(required=True)  
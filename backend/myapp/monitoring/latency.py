@@ -0,0 +1,23 @@
+from collections import deque
+
+
+# Most recent latency samples in milliseconds; bounded so memory stays flat
+class LatencyWindow:
+    def __init__(self, size=500):
+        self._samples = deque(maxlen=size)
+
+    def add(self, milliseconds):
+        self._samples.append(milliseconds)
+
+    def summary(self):
+        # deque.copy() is atomic, another thread may be appending meanwhile
+        values = sorted(self._samples.copy())
+        if not values:
+            return {"count": 0, "avg": None, "p50": None, "p95": None, "max": None}
+        return {
+            "count": len(values),
+            "avg": round(sum(values) / len(values), 2),
+            "p50": round(values[len(values) // 2], 2),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            "max": round(values[-1], 2)
+        }
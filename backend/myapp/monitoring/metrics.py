@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+from flask import Response, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+from pymongo import monitoring
+
+from core.auth import require_ops_token
+
+# With gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty directory before start.
+# Every worker then writes its samples there and /metrics merges all of them.
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request latency', ['method', 'route'])
+REQUESTS = Counter('http_requests_total', 'Requests by status code', ['method', 'route', 'status'])
+REQUEST_MONGO_COMMANDS = Histogram('http_request_mongo_commands', 'Mongo commands issued per request', ['route'],
+                                   buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250))
+REQUEST_MONGO_SECONDS = Histogram('http_request_mongo_seconds', 'Time spent in Mongo per request', ['route'])
+MONGO_COMMANDS = Counter('mongo_commands_total', 'Mongo commands', ['command', 'outcome'])
+MONGO_COMMAND_SECONDS = Histogram('mongo_command_duration_seconds', 'Mongo command latency', ['command'])
+EMAILS_ENQUEUED = Counter('emails_enqueued_total', 'Emails queued in the outbox', ['route'])
+EMAILS_SENT = Counter('emails_sent_total', 'Outbox SMTP sends', ['outcome'])
+EMAIL_SEND_SECONDS = Histogram('email_send_duration_seconds', 'SMTP send latency')
+
+# Per-request counters; pymongo reports a command on the thread that ran it
+_request = threading.local()
+
+
+def _current_route():
+    return getattr(_request, 'route', None)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, 'ok')
+
+    def failed(self, event):
+        self._record(event, 'error')
+
+    def _record(self, event, outcome):
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMANDS.labels(event.command_name, outcome).inc()
+        MONGO_COMMAND_SECONDS.labels(event.command_name).observe(seconds)
+        if _current_route() is not None:
+            _request.mongo_commands += 1
+            _request.mongo_seconds += seconds
+
+
+def record_email_enqueued():
+    EMAILS_ENQUEUED.labels(_current_route() or 'background').inc()
+
+
+def record_email_sent(seconds, ok=True):
+    EMAILS_SENT.labels('ok' if ok else 'error').inc()
+    if ok:
+        EMAIL_SEND_SECONDS.observe(seconds)
+
+
+class RequestMetrics:
+    # Must be set up before the first MongoClient is created, pymongo only
+    # attaches globally registered listeners to clients built afterwards
+    def __init__(self, app=None):
+        self.command_listener = MongoCommandMetrics()
+        monitoring.register(self.command_listener)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', require_ops_token(self.metrics_view))
+        app.extensions['request_metrics'] = self
+
+    def _before_request(self):
+        # The rule template, not the path, keeps label cardinality bounded
+        _request.route = request.url_rule.rule if request.url_rule else 'unmatched'
+        _request.started = time.perf_counter()
+        _request.mongo_commands = 0
+        _request.mongo_seconds = 0.0
+
+    def _after_request(self, response):
+        route = _current_route()
+        if route is None:
+            return response
+        REQUEST_LATENCY.labels(request.method, route).observe(time.perf_counter() - _request.started)
+        REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+        REQUEST_MONGO_COMMANDS.labels(route).observe(_request.mongo_commands)
+        REQUEST_MONGO_SECONDS.labels(route).observe(_request.mongo_seconds)
+        _request.route = None
+        return response
+
+    def metrics_view(self):
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,183 @@
+import json
+import os
+import sysconfig
+import threading
+import time
+import traceback
+from collections import namedtuple
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+# Handshake, auth and housekeeping commands say nothing about the code's query pattern.
+# createIndexes runs once per process when mongoengine first touches a collection, and
+# getMore continues a cursor whose find or aggregate was already counted.
+IGNORED_COMMANDS = {'hello', 'ismaster', 'isMaster', 'saslStart', 'saslContinue', 'authenticate', 'getnonce',
+                    'ping', 'buildInfo', 'endSessions', 'killCursors', 'createIndexes', 'getMore'}
+# Frames from these directories are skipped when fingerprinting the caller
+_LIBRARY_PATHS = tuple({sysconfig.get_paths()['stdlib'], sysconfig.get_paths()['purelib'],
+                        sysconfig.get_paths()['platlib'], os.path.dirname(__file__)})
+FINGERPRINT_DEPTH = 3
+
+QueryRecord = namedtuple('QueryRecord', ['command', 'collection', 'shape', 'fingerprint', 'duration_ms'])
+
+_active = threading.local()
+
+
+def query_shape(value):
+    # The command with every literal replaced by its type, so the same query with
+    # different ids compares equal; lists collapse to the shape of their first item
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(value[0])] if value else []
+    return type(value).__name__
+
+
+def command_shape(command_name, command):
+    if command_name == 'find':
+        parts = {'filter': command.get('filter', {}), 'projection': command.get('projection'),
+                 'sort': command.get('sort')}
+    elif command_name == 'aggregate':
+        parts = {'pipeline': command.get('pipeline', [])}
+    elif command_name in ('update', 'delete'):
+        statements = command.get('updates' if command_name == 'update' else 'deletes', [])
+        parts = {'q': statements[0].get('q', {}) if statements else {}, 'count': len(statements) > 1}
+    elif command_name in ('count', 'distinct', 'findAndModify'):
+        parts = {'query': command.get('query', {})}
+    else:
+        parts = {}
+    return json.dumps(query_shape(parts), sort_keys=True)
+
+
+def caller_fingerprint():
+    # The innermost application frames that led to the command
+    frames = [frame for frame in traceback.extract_stack()[:-1] if not frame.filename.startswith(_LIBRARY_PATHS)]
+    return " < ".join(f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+                      for frame in reversed(frames[-FINGERPRINT_DEPTH:]))
+
+
+class QueryTracker:
+    def __init__(self):
+        self.queries = []
+        self._pending = {}
+
+    def _started(self, event):
+        collection = event.command.get(event.command_name)
+        self._pending[event.request_id] = (
+            event.command_name,
+            collection if isinstance(collection, str) else None,
+            command_shape(event.command_name, event.command),
+            caller_fingerprint(),
+            time.perf_counter()
+        )
+
+    def _finished(self, event):
+        pending = self._pending.pop(event.request_id, None)
+        if pending is not None:
+            command, collection, shape, fingerprint, started = pending
+            self.queries.append(QueryRecord(command, collection, shape, fingerprint,
+                                            round((time.perf_counter() - started) * 1000, 3)))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated_queries(self, threshold=3):
+        # Same command shape from the same call site issued threshold+ times: an N+1 pattern
+        groups = {}
+        for query in self.queries:
+            groups.setdefault((query.command, query.collection, query.shape, query.fingerprint), []).append(query)
+        return [
+            {"command": command, "collection": collection, "shape": shape, "fingerprint": fingerprint,
+             "count": len(queries)}
+            for (command, collection, shape, fingerprint), queries in groups.items() if len(queries) >= threshold
+        ]
+
+    def report(self):
+        lines = [f"{self.count} Mongo commands:"]
+        lines += [f"  {query.command} {query.collection} {query.shape} at {query.fingerprint}" for query in self.queries]
+        for pattern in self.repeated_queries():
+            lines.append(f"  N+1: {pattern['count']}x {pattern['command']} {pattern['collection']} "
+                         f"at {pattern['fingerprint']}")
+        return "\n".join(lines)
+
+
+class QueryTrackingListener(monitoring.CommandListener):
+    # Forwards commands to the tracker active on the issuing thread, if any
+    def started(self, event):
+        tracker = getattr(_active, 'tracker', None)
+        if tracker is not None and event.command_name not in IGNORED_COMMANDS:
+            tracker._started(event)
+
+    def succeeded(self, event):
+        tracker = getattr(_active, 'tracker', None)
+        if tracker is not None:
+            tracker._finished(event)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+_listener = None
+
+
+def install():
+    # Register once, before the Mongo clients are created
+    global _listener
+    if _listener is None:
+        _listener = QueryTrackingListener()
+        monitoring.register(_listener)
+
+
+@contextmanager
+def track_queries():
+    tracker = QueryTracker()
+    previous = getattr(_active, 'tracker', None)
+    _active.tracker = tracker
+    try:
+        yield tracker
+    finally:
+        _active.tracker = previous
+
+
+@contextmanager
+def query_budget(max_queries, allow_repeated=False):
+    # Fails when the block issues more Mongo commands than the budget, or repeats
+    # the same query from one call site, and lists every command it saw
+    with track_queries() as tracker:
+        yield tracker
+    problems = []
+    if tracker.count > max_queries:
+        problems.append(f"expected at most {max_queries} Mongo commands, got {tracker.count}")
+    if not allow_repeated and tracker.repeated_queries():
+        problems.append("repeated same-shape queries (N+1)")
+    if problems:
+        raise AssertionError("; ".join(problems) + "\n" + tracker.report())
+
+
+def init_app(app):
+    # With QUERY_TRACKING=true every request is tracked and N+1 patterns are logged
+    install()
+    if os.getenv("QUERY_TRACKING", "false").lower() != "true":
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _start_tracking():
+        g.query_tracker = QueryTracker()
+        g.previous_query_tracker = getattr(_active, 'tracker', None)
+        _active.tracker = g.query_tracker
+
+    @app.after_request
+    def _stop_tracking(response):
+        tracker = g.pop('query_tracker', None)
+        if tracker is None:
+            return response
+        _active.tracker = g.pop('previous_query_tracker', None)
+        response.headers['X-Query-Count'] = str(tracker.count)
+        for pattern in tracker.repeated_queries():
+            print(f"N+1 in {request.method} {request.path}: {pattern['count']}x {pattern['command']} "
+                  f"{pattern['collection']} at {pattern['fingerprint']}")
+        return response
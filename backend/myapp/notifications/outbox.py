@@ -0,0 +1,214 @@
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+
+import mongoengine as db
+from flask_mail import Message
+
+from monitoring.latency import LatencyWindow
+from monitoring.metrics import record_email_enqueued, record_email_sent
+
+
+# Persistent outbox: request handlers only insert a document here, the
+# background worker delivers it later over a shared SMTP connection.
+class OutboxMessage(db.Document):
+    subject = db.StringField(required=True)
+    sender = db.StringField(required=True)
+    recipients = db.ListField(db.StringField(), required=True)
+    body = db.StringField()
+    html = db.StringField()
+    # 'unconfirmed': handed to SMTP but the outcome was never recorded; it is not resent
+    status = db.StringField(default='pending', choices=['pending', 'sending', 'sent', 'failed', 'unconfirmed'])
+    attempts = db.IntField(default=0)
+    next_attempt_at = db.DateTimeField(default=datetime.utcnow)
+    locked_until = db.DateTimeField()
+    # Set right before the message is given to SMTP, cleared when it is rescheduled
+    handed_off_at = db.DateTimeField()
+    created_at = db.DateTimeField(default=datetime.utcnow)
+    sent_at = db.DateTimeField()
+    last_error = db.StringField()
+
+    meta = {
+        'collection': 'email_outbox',
+        'indexes': [
+            ('status', 'next_attempt_at'),
+            # Delivered messages are kept for a week for debugging, then expire
+            {'fields': ['sent_at'], 'expireAfterSeconds': 7 * 24 * 3600}
+        ]
+    }
+
+
+class EmailOutbox:
+    def __init__(self, app=None, mail=None):
+        self.app = None
+        self.mail = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sent_count = 0
+        self._failed_count = 0
+        self._send_latency = LatencyWindow()
+        self._delivery_latency = LatencyWindow()
+        if app is not None and mail is not None:
+            self.init_app(app, mail)
+
+    def init_app(self, app, mail):
+        self.app = app
+        self.mail = mail
+        app.config.setdefault('OUTBOX_BATCH_SIZE', 50)
+        app.config.setdefault('OUTBOX_MAX_ATTEMPTS', 5)
+        app.config.setdefault('OUTBOX_BACKOFF_SECONDS', 30)
+        app.config.setdefault('OUTBOX_LEASE_SECONDS', 120)
+        app.config.setdefault('OUTBOX_POLL_SECONDS', 5)
+        app.config.setdefault('OUTBOX_WORKER', True)
+        app.extensions['email_outbox'] = self
+        # Started by the first request of every worker too, so mail left pending or
+        # backed off before a restart goes out without waiting for new mail
+        app.before_request(self._ensure_worker)
+
+    def enqueue(self, subject, sender, recipients, body, html=None):
+        message = OutboxMessage(
+            subject=subject,
+            sender=sender,
+            recipients=list(recipients),
+            body=body,
+            html=html
+        ).save()
+        record_email_enqueued()
+        self._ensure_worker()
+        self._wake.set()
+        return message
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so each gunicorn worker starts its own
+        if not self.app.config['OUTBOX_WORKER']:
+            return
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                processed = self.process_batch()
+            except Exception as e:
+                print(f"Outbox worker error: {e}")
+                processed = 0
+            if not processed:
+                self._wake.wait(self.app.config['OUTBOX_POLL_SECONDS'])
+                self._wake.clear()
+
+    def _claim_batch(self):
+        # Atomically lease due messages so several workers never send the same one.
+        # Messages stuck in 'sending' past their lease belong to a crashed worker, or one
+        # that could not record the result. Those already handed to SMTP may have been
+        # delivered, so they are set aside as 'unconfirmed' instead of being sent again.
+        now = datetime.utcnow()
+        lease = now + timedelta(seconds=self.app.config['OUTBOX_LEASE_SECONDS'])
+        OutboxMessage.objects(status='sending', locked_until__lte=now, handed_off_at__ne=None).update(
+            set__status='unconfirmed', unset__locked_until=True)
+        due = (db.Q(status='pending', next_attempt_at__lte=now) |
+               db.Q(status='sending', locked_until__lte=now, handed_off_at=None))
+        batch = []
+        for _ in range(self.app.config['OUTBOX_BATCH_SIZE']):
+            message = OutboxMessage.objects(due).order_by('next_attempt_at').modify(
+                set__status='sending', set__locked_until=lease, new=True)
+            if message is None:
+                break
+            batch.append(message)
+        return batch
+
+    def process_batch(self):
+        batch = self._claim_batch()
+        if not batch:
+            return 0
+
+        with self.app.app_context():
+            try:
+                # One SMTP session for the whole batch instead of one per email
+                with self.mail.connect() as connection:
+                    for index, message in enumerate(batch):
+                        try:
+                            self._send(connection, message)
+                        except (smtplib.SMTPServerDisconnected, OSError) as e:
+                            # The session is gone; retry this one and release the rest
+                            self._reschedule(message, e)
+                            for pending in batch[index + 1:]:
+                                self._release(pending)
+                            break
+                        except Exception as e:
+                            self._reschedule(message, e)
+            except Exception as e:
+                # Could not open the connection at all
+                for message in batch:
+                    if message.status == 'sending':
+                        self._reschedule(message, e)
+        return len(batch)
+
+    def _send(self, connection, message):
+        msg = Message(message.subject, sender=message.sender, recipients=message.recipients)
+        msg.body = message.body
+        msg.html = message.html
+
+        # If this cannot be recorded the message is not sent, and goes back to the retry path
+        message.update(set__handed_off_at=datetime.utcnow())
+        started = time.perf_counter()
+        try:
+            connection.send(msg)
+        except Exception:
+            record_email_sent(time.perf_counter() - started, ok=False)
+            raise
+        elapsed = time.perf_counter() - started
+
+        # Delivered. Nothing below may raise into the retry path, or the message would
+        # be sent twice; if marking it fails, handed_off_at keeps it from being claimed again.
+        message.status = 'sent'
+        try:
+            now = datetime.utcnow()
+            message.update(set__status='sent', set__sent_at=now, unset__locked_until=True,
+                           inc__attempts=1, unset__last_error=True)
+            self._sent_count += 1
+            self._send_latency.add(elapsed * 1000)
+            self._delivery_latency.add((now - message.created_at).total_seconds() * 1000)
+            record_email_sent(elapsed)
+        except Exception as e:
+            print(f"Email {message.id} was sent but could not be recorded: {e}")
+
+    def _reschedule(self, message, error):
+        attempts = message.attempts + 1
+        print(f"Failed to send email {message.id} (attempt {attempts}): {error}")
+        if attempts >= self.app.config['OUTBOX_MAX_ATTEMPTS']:
+            self._failed_count += 1
+            message.update(set__status='failed', set__attempts=attempts,
+                           set__last_error=str(error), unset__locked_until=True, unset__handed_off_at=True)
+            message.status = 'failed'
+            return
+        # Exponential backoff: 30s, 60s, 120s, ...
+        delay = self.app.config['OUTBOX_BACKOFF_SECONDS'] * (2 ** (attempts - 1))
+        message.update(set__status='pending', set__attempts=attempts, set__last_error=str(error),
+                       set__next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+                       unset__locked_until=True, unset__handed_off_at=True)
+        message.status = 'pending'
+
+    def _release(self, message):
+        message.update(set__status='pending', unset__locked_until=True)
+        message.status = 'pending'
+
+    def stats(self):
+        return {
+            "queue_depth": OutboxMessage.objects(status__in=['pending', 'sending']).count(),
+            "failed": OutboxMessage.objects(status='failed').count(),
+            "unconfirmed": OutboxMessage.objects(status='unconfirmed').count(),
+            "sent_since_start": self._sent_count,
+            "failed_since_start": self._failed_count,
+            "send_latency_ms": self._send_latency.summary(),
+            "delivery_latency_ms": self._delivery_latency.summary()
+        }
@@ -0,0 +1,101 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import bcrypt
+
+from monitoring.latency import LatencyWindow
+
+
+class HashingOverloaded(Exception):
+    # Raised instead of queueing when every worker and queue slot is taken
+    def __init__(self, retry_after):
+        super().__init__("Password hashing is overloaded")
+        self.retry_after = retry_after
+
+
+# bcrypt releases the GIL while hashing, so a small thread pool gives real
+# parallelism. The pool plus a short queue is capped; anything beyond that is
+# rejected right away so a login burst cannot pile up behind slow hashes and
+# tie up every request thread.
+class PasswordHasher:
+    def __init__(self, rounds=12, workers=2, queue_size=8, timeout=10):
+        self.rounds = rounds
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._rejected = 0
+        self._timed_out = 0
+        self._queue_wait = LatencyWindow()
+        self._hash_latency = LatencyWindow()
+
+    def hash_password(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check_password(self, password, hashed):
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        # Stored hashes look like $2b$12$<salt+hash>, the middle field is the cost
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingOverloaded(self.retry_after())
+
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            self._queue_wait.add((started - submitted) * 1000)
+            try:
+                return func(*args)
+            finally:
+                self._hash_latency.add((time.perf_counter() - started) * 1000)
+
+        with self._lock:
+            self._in_flight += 1
+        # The slot is freed when the hash actually finishes, not when the caller
+        # gives up waiting, so timed out work still counts against the limit
+        future = self._executor.submit(task)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            raise HashingOverloaded(self.retry_after())
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def retry_after(self):
+        # Seconds until the current backlog should have drained, at least one
+        average_ms = self._hash_latency.summary()["avg"] or 0
+        backlog = self._in_flight / self.workers
+        return max(1, math.ceil(backlog * average_ms / 1000))
+
+    def stats(self):
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+            "queue_wait_ms": self._queue_wait.summary(),
+            "hash_latency_ms": self._hash_latency.summary()
+        }
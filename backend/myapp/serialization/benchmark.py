@@ -0,0 +1,73 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import Flask, jsonify
+
+from core.models import PersonalExpense
+from serialization.json_response import encode_json, orjson
+
+# The app keeps Flask's default JSON provider. A bare Flask app has the same one and
+# needs no database, where pushing the real app's context connects to DB_URI.
+app = Flask(__name__)
+
+
+def synthetic_rows(count):
+    # Raw documents shaped like PersonalExpense.objects.as_pymongo()
+    user_id = ObjectId()
+    start = datetime(2020, 1, 1)
+    categories = ["Food", "Travel", "Shopping", "Bills", "Health"]
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "amount": round(1 + (i * 7.31) % 500, 2),
+            "name": f"Expense {i}",
+            "date": start + timedelta(minutes=i),
+            "category": categories[i % len(categories)]
+        }
+        for i in range(count)
+    ]
+
+
+def document_path(rows):
+    # What the list routes did: build each document, to_json it, then jsonify.
+    # References are not dereferenced here, so real requests were slower still.
+    documents = [PersonalExpense._from_son(row, _auto_dereference=False) for row in rows]
+    return jsonify({"success": True, "expenses": [doc.to_json() for doc in documents]}).get_data()
+
+
+def raw_path(rows):
+    return encode_json({"success": True, "expenses": [PersonalExpense.raw_to_json(row) for row in rows]},
+                       app.json.dumps)
+
+
+def best_of(func, rows, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func(rows)
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare to_json serialization with the raw fast path")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    with app.test_request_context():
+        slow, slow_body = best_of(document_path, rows, args.repeat)
+        fast, fast_body = best_of(raw_path, rows, args.repeat)
+
+    assert slow_body == fast_body, "fast path output differs from to_json + jsonify"
+    print(f"{args.rows} expenses, {len(fast_body) / 2 ** 20:.1f} MB, orjson {'on' if orjson else 'off'}")
+    print(f"to_json + jsonify:      {slow * 1000:.1f} ms")
+    print(f"raw_to_json + fast:     {fast * 1000:.1f} ms ({slow / fast:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+from flask import current_app, jsonify
+
+try:
+    import orjson
+except ImportError:
+    # Without orjson every body goes through Flask's own encoder
+    orjson = None
+
+
+def encode_json(payload, fallback_dumps):
+    # Bytes identical to Flask's compact jsonify output: sorted keys, no spaces,
+    # ASCII only and a trailing newline. orjson writes non-ASCII text as raw UTF-8
+    # where Flask escapes it, so such bodies are re-encoded with fallback_dumps, an
+    # app.json.dumps. jsonify passes it the compact separators itself, so they are
+    # passed here too. Float formatting only differs outside the range money amounts can take.
+    if orjson is not None:
+        try:
+            body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+        except (orjson.JSONEncodeError, TypeError):
+            body = None
+        if body is not None and body.isascii():
+            return body
+    return (fallback_dumps(payload, separators=(",", ":")) + "\n").encode()
+
+
+def fast_jsonify(payload, status=200):
+    # Drop-in for jsonify on large list responses
+    provider = current_app.json
+    if provider.compact is False or (provider.compact is None and current_app.debug):
+        # Debug output is indented, leave that to Flask
+        return jsonify(payload), status
+    body = encode_json(payload, provider.dumps)
+    return current_app.response_class(body, status=status, mimetype=provider.mimetype)
@@ -0,0 +1,114 @@
+# Tests run against an in-memory mongomock by default. Set TEST_DB_URI to a
+# local mongod (it is emptied before every test) to also run the tests that
+# need a real server, such as the query budgets.
+import functools
+import os
+from datetime import datetime, timedelta
+
+import jwt
+import mongoengine as db
+import pytest
+
+TEST_DB_URI = os.getenv("TEST_DB_URI")
+os.environ["DB_URI"] = TEST_DB_URI or "mongodb://localhost:27017/expenses_test"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from database import connection  # noqa: E402
+
+
+def _register_mock_connections():
+    import mongomock
+
+    # Both aliases share one in-memory server, like they share one replica set
+    client_class = functools.partial(mongomock.MongoClient, _store=mongomock.store.ServerStore())
+    for alias in [db.DEFAULT_CONNECTION_NAME, connection.READ_ALIAS]:
+        db.register_connection(alias, host=os.environ["DB_URI"], mongo_client_class=client_class)
+
+
+if not TEST_DB_URI:
+    connection._register_connections = _register_mock_connections
+
+requires_mongod = pytest.mark.skipif(not TEST_DB_URI, reason="needs a real mongod, set TEST_DB_URI")
+
+
+@pytest.fixture
+def app():
+    from app import app
+    from core.auth import token_cache, user_cache
+    from core.groups import group_access
+
+    # Background threads would race the per-test cleanup; tests drive them directly
+    app.config.update(OUTBOX_WORKER=False, GROUP_DELETE_WORKER=False)
+    connection.init_db()
+    database = db.get_db()
+    for name in database.list_collection_names():
+        if not name.startswith('system.'):
+            database[name].delete_many({})
+    for cache in [token_cache, user_cache, group_access]:
+        cache.clear()
+    return app
+
+
+@pytest.fixture
+def lagging_secondary(app):
+    # READ_ALIAS on a server that has replicated nothing yet
+    if TEST_DB_URI:
+        pytest.skip("simulated with mongomock only")
+    import mongomock
+    db.disconnect(connection.READ_ALIAS)
+    db.register_connection(connection.READ_ALIAS, host=os.environ["DB_URI"],
+                           mongo_client_class=functools.partial(mongomock.MongoClient,
+                                                                _store=mongomock.store.ServerStore()))
+    yield
+    db.disconnect(connection.READ_ALIAS)
+    primary = db.get_connection()
+    db.register_connection(connection.READ_ALIAS, host=os.environ["DB_URI"], mongo_client_class=lambda **kwargs: primary)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def asgi_client(app):
+    import asgi
+    from starlette.testclient import TestClient
+
+    if TEST_DB_URI:
+        with TestClient(asgi.app) as client:
+            yield client
+        return
+
+    # mongomock_motor wraps the same in-memory server the Flask routes use
+    from mongomock_motor import AsyncMongoMockClient
+    motor_client = AsyncMongoMockClient(mock_mongo_client=db.get_connection())
+    asgi.motor.update(client=motor_client, db=motor_client.get_database(db.get_db().name))
+    try:
+        yield TestClient(asgi.app)
+    finally:
+        asgi.motor.clear()
+
+
+def make_token(user_id, secret_key=None):
+    return jwt.encode({"user_id": str(user_id), "exp": datetime.utcnow() + timedelta(hours=1)},
+                      secret_key or os.environ["SECRET_KEY"], algorithm="HS256")
+
+
+@pytest.fixture
+def auth_headers():
+    def headers(user):
+        return {"Authorization": f"Bearer {make_token(user.id)}"}
+    return headers
+
+
+@pytest.fixture
+def make_user(app):
+    from core.models import User
+
+    def make(username="alice", **fields):
+        fields.setdefault("email", f"{username}@example.com")
+        fields.setdefault("password", "not-a-real-hash")
+        return User(username=username, first_name=username.title(), last_name="Test", **fields).save()
+    return make
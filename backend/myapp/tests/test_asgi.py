@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from core.auth import token_cache
+from core.models import PersonalExpense
+
+
+def test_native_route_verifies_a_fresh_token(asgi_client, make_user, auth_headers):
+    # The native routes decode the JWT outside any Flask app context
+    user = make_user()
+    PersonalExpense(user_id=user.id, amount=12.5, name="Lunch", category="Food", date=datetime(2024, 3, 1)).save()
+    token_cache.clear()
+
+    response = asgi_client.get('/api/personal_expenses', headers=auth_headers(user))
+    assert response.status_code == 200
+    assert [expense["name"] for expense in response.json()["expenses"]] == ["Lunch"]
+
+
+def test_native_route_rejects_a_bad_token(asgi_client):
+    response = asgi_client.get('/api/personal_expenses', headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
@@ -0,0 +1,101 @@
+import random
+from fractions import Fraction
+
+import pytest
+
+from bill_settlement.benchmark import generate_expenses
+from bill_settlement.bill_settle import (compute_balances, expense_deltas, settle_balances, settle_expenses,
+                                         split_cents, FEWEST_TRANSFERS_LIMIT)
+
+SEEDS = range(200)
+
+
+def random_balances(rng, people):
+    amounts = [rng.randint(-50000, 50000) for _ in range(people - 1)]
+    return {f"user{i}": cents for i, cents in enumerate(amounts + [-sum(amounts)])}
+
+
+def apply_settlements(balances, settlements):
+    remaining = dict(balances)
+    for sender, receiver, cents in settlements:
+        assert cents > 0 and sender != receiver
+        assert balances[sender] > 0 > balances[receiver]
+        remaining[sender] -= cents
+        remaining[receiver] += cents
+    return remaining
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_settlement_conserves_money(seed):
+    rng = random.Random(seed)
+    balances = random_balances(rng, rng.randint(1, 60))
+    settlements = settle_balances(balances)
+    assert not any(apply_settlements(balances, settlements).values())
+    assert len(settlements) <= max(len([cents for cents in balances.values() if cents]) - 1, 0)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_fewest_transfers_never_needs_more(seed):
+    rng = random.Random(seed)
+    balances = random_balances(rng, rng.randint(1, FEWEST_TRANSFERS_LIMIT - 2))
+    if rng.random() < 0.5:
+        # A pair that cancels exactly is where the exact search can win
+        balances.update({"pair_a": 700, "pair_b": -700})
+    greedy = settle_balances(balances)
+    fewest = settle_balances(balances, fewest_transfers=True)
+    assert not any(apply_settlements(balances, fewest).values())
+    assert len(fewest) <= len(greedy)
+
+
+def test_fewest_transfers_splits_zero_sum_groups():
+    balances = {"a": 500, "b": -300, "c": -200, "d": 400, "e": -400}
+    assert len(settle_balances(balances)) == 4
+    assert len(settle_balances(balances, fewest_transfers=True)) == 3
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_split_cents_adds_up_exactly(seed):
+    rng = random.Random(seed)
+    amount = rng.randint(0, 10 ** 7)
+    weights = {f"user{i}": rng.choice([1, rng.randint(1, 100), 100 / 3]) for i in range(rng.randint(1, 12))}
+    parts = split_cents(amount, weights)
+    assert sum(parts.values()) == amount
+    total = sum(weights.values())
+    for person, weight in weights.items():
+        assert abs(parts[person] - amount * weight / total) < 1
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_expense_deltas_of_a_full_split_sum_to_zero(seed):
+    expense = generate_expenses(random.Random(seed).randint(1, 10), 1, seed=seed)[0]
+    deltas = expense_deltas(expense)
+    assert sum(deltas.values()) == 0
+    assert deltas.get(expense["payer"], 0) >= -round(expense["amount"] * 100)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_compute_balances_is_within_a_cent_of_exact(seed):
+    rng = random.Random(seed)
+    expenses = generate_expenses(rng.randint(2, 10), rng.randint(1, 300), seed=seed)
+    exact = {}
+    for expense in expenses:
+        amount = Fraction(round(expense["amount"] * 100))
+        exact[expense["payer"]] = exact.get(expense["payer"], 0) - amount
+        for person, percentage in expense["shares"].items():
+            exact[person] = exact.get(person, 0) + amount * Fraction(percentage) / 100
+
+    balances = compute_balances(expenses)
+    assert sum(balances.values()) == 0
+    for person, value in exact.items():
+        assert abs(balances.get(person, 0) - value) < 1
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_settle_expenses_clears_every_balance(seed):
+    rng = random.Random(seed)
+    expenses = generate_expenses(rng.randint(2, 10), rng.randint(1, 40), seed=seed)
+    balances = compute_balances(expenses)
+    for fewest_transfers in [False, True]:
+        settlements = settle_expenses(expenses, fewest_transfers=fewest_transfers)
+        cents = [(sender, receiver, round(amount * 100)) for sender, receiver, amount in settlements]
+        assert not any(apply_settlements(balances, cents).values())
@@ -0,0 +1,86 @@
+# The same requests against the Flask app and the ASGI entry point must get
+# the same status and body, for the native Motor routes and the fall-through ones
+from datetime import datetime
+
+import pytest
+
+from core.auth import token_cache
+from core.models import PersonalExpense, Group, GroupExpense
+from conftest import requires_mongod
+from loadtest.compare import DEFAULT_PATHS
+
+# mongomock lacks $lookup with let and $dateTrunc
+MONGOD_PATHS = ["/api/groups", "/api/dashboard/summary"]
+FALLTHROUGH_PATHS = [
+    "/api/users/get_budget",
+    "/api/dashboard/summary",
+    "/api/personal_expenses?limit=abc",
+    "/api/personal_expenses?cursor=not-a-cursor",
+    "/api/dashboard/get_expenses?start=2024-02-01"
+]
+
+
+@pytest.fixture
+def seeded(app, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    for day, (name, amount, category) in enumerate([("Rent", 900.0, "Housing"), ("Lunch", 12.5, "Food"),
+                                                    ("Taxi", 23.75, "Transport"), ("Cinema", 15.0, "Fun")]):
+        PersonalExpense(user_id=alice.id, name=name, amount=amount, category=category,
+                        date=datetime(2024, 1 + day, 10)).save()
+    group = Group(groupName="Trip", admin=alice, members=[bob]).save()
+    GroupExpense(group_id=group, paidBy=alice, amount=30.0, description="Dinner", paid_for=[alice, bob],
+                 splitMethod='equal',
+                 splitDetails={'payer': str(alice.id), 'shares': {str(alice.id): 50, str(bob.id): 50}},
+                 owed=[{'member_id': alice.id, 'owed_cents': 1500}, {'member_id': bob.id, 'owed_cents': 1500}],
+                 date=datetime(2024, 2, 1)).save()
+    return alice, group
+
+
+def assert_same_response(client, asgi_client, path, headers):
+    expected = client.get(path, headers=headers)
+    # A cold token cache on both sides, so each decodes the token itself
+    token_cache.clear()
+    actual = asgi_client.get(path, headers=headers)
+    assert (actual.status_code, actual.content) == (expected.status_code, expected.data)
+    # Two identical 500s would pass the comparison while both apps are broken
+    assert expected.status_code < 500, expected.get_data(as_text=True)
+    return expected
+
+
+@pytest.mark.parametrize("path", [pytest.param(path, marks=requires_mongod) if path in MONGOD_PATHS else path
+                                  for path in DEFAULT_PATHS + FALLTHROUGH_PATHS])
+def test_same_response(client, asgi_client, seeded, auth_headers, path):
+    alice, _ = seeded
+    token_cache.clear()
+    assert_same_response(client, asgi_client, path, auth_headers(alice))
+
+
+def test_same_group_routes(client, asgi_client, seeded, auth_headers):
+    alice, group = seeded
+    for path in [f"/api/groups/{group.id}", f"/api/groups/{group.id}/expenses"]:
+        assert assert_same_response(client, asgi_client, path, auth_headers(alice)).status_code == 200
+
+
+def test_same_pages(client, asgi_client, seeded, auth_headers):
+    alice, _ = seeded
+    path = "/api/personal_expenses?limit=1"
+    pages = 0
+    while path:
+        body = assert_same_response(client, asgi_client, path, auth_headers(alice)).get_json()
+        pages += 1
+        path = body["next_cursor"] and f"/api/personal_expenses?limit=1&cursor={body['next_cursor']}"
+    assert pages == 4
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": ""}, {"Authorization": "Bearer not-a-token"}])
+@pytest.mark.parametrize("path", DEFAULT_PATHS)
+def test_same_auth_failures(client, asgi_client, seeded, path, headers):
+    assert assert_same_response(client, asgi_client, path, headers).status_code == 401
+
+
+def test_same_unknown_user(client, asgi_client, seeded, auth_headers, make_user):
+    ghost = make_user("ghost")
+    headers = auth_headers(ghost)
+    ghost.delete()
+    for path in DEFAULT_PATHS:
+        assert assert_same_response(client, asgi_client, path, headers).status_code == 404
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from core.models import User, PersonalExpense, Group, GroupExpense
+
+
+@pytest.fixture
+def alice(make_user):
+    user = make_user("alice")
+    PersonalExpense(user_id=user.id, amount=12.5, name="Lunch", category="Food", date=datetime(2024, 3, 1)).save()
+    return user
+
+
+def add_expense(client, headers, name):
+    response = client.post('/api/personal_expenses/add', headers=headers,
+                           json={"amount": 5, "name": name, "category": "Food", "date": "2024-03-02T10:00:00.000Z"})
+    assert response.status_code == 201
+
+
+@pytest.mark.parametrize("path", ["/api/dashboard/get_all_expenses", "/api/dashboard/get_expenses?start=2024-01-01"])
+def test_etagged_body_comes_from_the_primary(client, alice, auth_headers, lagging_secondary, path):
+    response = client.get(path, headers=auth_headers(alice))
+    assert response.headers['ETag']
+    assert [expense["name"] for expense in response.get_json()["expenses"]] == ["Lunch"]
+
+
+def test_etagged_group_expenses_come_from_the_primary(client, make_user, auth_headers, lagging_secondary):
+    alice, bob = make_user("alice"), make_user("bob")
+    group = Group(groupName="Trip", admin=alice, members=[bob]).save()
+    GroupExpense(group_id=group, paidBy=alice, amount=10.0, description="Taxi", paid_for=[bob], splitMethod='payment',
+                 splitDetails={'payer': str(alice.id), 'shares': {str(bob.id): 100}},
+                 owed=[{'member_id': bob.id, 'owed_cents': 1000}]).save()
+    response = client.get(f'/api/groups/{group.id}/expenses', headers=auth_headers(alice))
+    assert [expense["description"] for expense in response.get_json()["expenses"]] == ["Taxi"]
+
+
+def test_not_modified_until_the_data_changes(client, alice, auth_headers):
+    headers = auth_headers(alice)
+    first = client.get('/api/dashboard/get_all_expenses', headers=headers)
+    etag = first.headers['ETag']
+    cached = client.get('/api/dashboard/get_all_expenses', headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    add_expense(client, headers, "Coffee")
+    changed = client.get('/api/dashboard/get_all_expenses', headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert [expense["name"] for expense in changed.get_json()["expenses"]] == ["Lunch", "Coffee"]
+
+
+def test_user_changed_by_another_worker_is_reloaded(client, alice, auth_headers):
+    headers = auth_headers(alice)
+    first = client.get('/api/dashboard/get_budget', headers=headers)
+    assert first.get_json()["budget"] == 1000
+    # What update_budget does in another worker, whose cache invalidation never reaches this one
+    User.objects(id=alice.id).update(budget=250, inc__data_version=1)
+
+    changed = client.get('/api/dashboard/get_budget', headers={**headers, "If-None-Match": first.headers['ETag']})
+    assert changed.status_code == 200
+    assert changed.get_json()["budget"] == 250
+    assert client.get('/api/dashboard/get_budget', headers={
+        **headers, "If-None-Match": changed.headers['ETag']}).status_code == 304
@@ -0,0 +1,34 @@
+import json
+from datetime import datetime
+
+from core.models import PersonalExpense, Group, GroupExpense
+
+
+def ndjson(response):
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_personal_export_rows_match_the_listing(client, make_user, auth_headers):
+    alice = make_user("alice")
+    for day in range(1, 4):
+        PersonalExpense(user_id=alice.id, amount=day * 1.5, name=f"Lunch {day}", category="Food",
+                        date=datetime(2024, 3, day)).save()
+    headers = auth_headers(alice)
+    listed = client.get('/api/personal_expenses', headers=headers).get_json()["expenses"]
+    assert ndjson(client.get('/api/personal_expenses/export', headers=headers)) == listed[::-1]
+
+
+def test_group_export_rows_match_the_listing(client, make_user, auth_headers):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    group = Group(groupName="Trip", admin=alice, members=[bob]).save()
+    for day, payee in [(1, bob), (2, carol)]:
+        # carol left the group, and is looked up while streaming
+        GroupExpense(group_id=group, paidBy=alice, amount=10.0 * day, description=f"Taxi {day}", paid_for=[payee],
+                     splitMethod='payment', splitDetails={'payer': str(alice.id), 'shares': {str(payee.id): 100}},
+                     owed=[{'member_id': payee.id, 'owed_cents': 1000 * day}], date=datetime(2024, 3, day)).save()
+    headers = auth_headers(alice)
+    listed = client.get(f'/api/groups/{group.id}/expenses', headers=headers).get_json()["expenses"]
+    exported = ndjson(client.get(f'/api/groups/{group.id}/export', headers=headers))
+    assert exported == listed[::-1]
+    assert exported[1]["paid_for"] == ["carol"]
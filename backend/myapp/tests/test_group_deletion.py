@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from core.group_deletion import GroupDeletion
+from core.models import Group, GroupExpense, GroupLedger
+
+
+def test_deleting_a_group_cleans_up_in_batches(app, client, make_user, auth_headers):
+    alice, bob = make_user("alice"), make_user("bob")
+    group = Group(groupName="Trip", admin=alice, members=[bob]).save()
+    for i in range(5):
+        GroupExpense(group_id=group, paidBy=alice, amount=10.0, description=f"Item {i}", splitMethod='payment',
+                     splitDetails={'payer': str(alice.id), 'shares': {str(bob.id): 100}},
+                     owed=[{'member_id': bob.id, 'owed_cents': 1000}], date=datetime(2024, 1, 1)).save()
+    app.config.update(GROUP_DELETE_BATCH_SIZE=2, GROUP_DELETE_PAUSE_SECONDS=0)
+
+    response = client.delete(f'/api/groups/{group.id}/delete', headers=auth_headers(alice))
+    assert response.status_code == 200
+    job_id = response.get_json()["cleanup_job_id"]
+    assert app.extensions['group_deletions'].drain() == 1
+
+    job = GroupDeletion.objects.get(id=job_id)
+    assert (job.status, job.total, job.deleted, job.batches) == ('done', 5, 5, 3)
+    assert GroupExpense.objects(group_id=group.id).count() == 0
+    assert GroupLedger.objects(group_id=group.id).count() == 0
+    status = client.get(f'/api/groups/deletions/{job_id}', headers=auth_headers(alice)).get_json()
+    assert status["data"]["progress"] == 1
+
+
+def payment(group):
+    alice, bob = group.admin, group.members[0]
+    return {"paid_by": str(alice.id), "amount": 10, "description": "Taxi", "paidFor": [str(bob.id)],
+            "splitMethod": "payment", "splitDetails": {"payer": str(alice.id), "shares": {str(bob.id): 100}}}
+
+
+def test_writes_to_a_group_deleted_by_another_worker_are_refused(client, make_user, auth_headers):
+    alice, bob = make_user("alice"), make_user("bob")
+    group = Group(groupName="Trip", admin=alice, members=[bob]).save()
+    headers = auth_headers(alice)
+    # Fills this worker's membership cache
+    assert client.get(f'/api/groups/{group.id}/members', headers=headers).status_code == 200
+    # Another worker deletes it and its cleanup finishes; this cache is never invalidated
+    Group.objects(id=group.id).delete()
+
+    assert client.post(f'/api/groups/{group.id}/add_expense', json=payment(group), headers=headers).status_code == 404
+    Group._get_collection().insert_one(group.to_mongo())
+    client.get(f'/api/groups/{group.id}/members', headers=headers)
+    Group.objects(id=group.id).delete()
+    assert client.post(f'/api/groups/{group.id}/add_expenses', json={"expenses": [payment(group)]},
+                       headers=headers).status_code == 404
+    assert GroupExpense.objects(group_id=group.id).count() == 0
+    assert GroupLedger.objects(group_id=group.id).count() == 0
+
+
+def test_a_group_deleted_during_the_write_keeps_no_expense(client, make_user, auth_headers, monkeypatch):
+    from blueprints import groups
+
+    alice, bob = make_user("alice"), make_user("bob")
+    group = Group(groupName="Trip", admin=alice, members=[bob]).save()
+    update_group_ledger = groups.update_group_ledger
+
+    def deleted_meanwhile(group_id, deltas):
+        update_group_ledger(group_id, deltas)
+        Group.objects(id=group_id).delete()
+    monkeypatch.setattr(groups, 'update_group_ledger', deleted_meanwhile)
+
+    response = client.post(f'/api/groups/{group.id}/add_expense', json=payment(group), headers=auth_headers(alice))
+    assert response.status_code == 404
+    assert GroupExpense.objects(group_id=group.id).count() == 0
+
+
+def test_membership_cache_keeps_no_state_per_group():
+    from bson import ObjectId
+    from caching.group_acl import GroupAccessCache
+
+    group_id = ObjectId()
+    cache = GroupAccessCache(lambda loaded_id: {'admin': ObjectId(), 'members': []}, maxsize=10)
+    for _ in range(1000):
+        cache.invalidate(ObjectId())
+    assert all(not isinstance(value, dict) for value in vars(cache).values())
+
+    def invalidated_while_loading(loaded_id):
+        cache.invalidate(loaded_id)
+        return {'admin': ObjectId(), 'members': []}
+    cache.load_group = invalidated_while_loading
+    cache.get(group_id)
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+from flask import jsonify
+
+from core.models import PersonalExpense
+from serialization import json_response
+from serialization.json_response import encode_json
+
+PAYLOADS = [
+    {"success": True, "expenses": [{"name": "Lunch", "amount": 3.5, "category": "Food"}]},
+    {"success": True, "expenses": [{"name": "Café crème", "amount": 3.5, "category": "Food €"}]},
+    {"b": [1, 2.25, None, "✓"], "a": {"nested": "日本"}}
+]
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "no orjson"])
+def orjson_installed(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(json_response, 'orjson', None)
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_bytes_match_jsonify(app, orjson_installed, payload):
+    with app.test_request_context():
+        assert encode_json(payload, app.json.dumps) == jsonify(payload).get_data()
+
+
+def test_listing_with_non_ascii_names_matches_jsonify(app, client, make_user, auth_headers, orjson_installed):
+    alice = make_user("alice")
+    PersonalExpense(user_id=alice.id, amount=3.5, name="Café", category="Food", date=datetime(2024, 3, 1)).save()
+    response = client.get('/api/dashboard/get_all_expenses', headers=auth_headers(alice))
+    with app.test_request_context():
+        assert response.get_data() == jsonify(response.get_json()).get_data()
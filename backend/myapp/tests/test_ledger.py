@@ -0,0 +1,114 @@
+from datetime import datetime
+
+import pytest
+
+from core.ledger import compute_group_balances, ensure_group_ledger, update_group_ledger
+from core.models import Group, GroupExpense, GroupLedger
+
+
+@pytest.fixture
+def group(make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    return Group(groupName="Trip", admin=alice, members=[bob]).save()
+
+
+def add_old_expense(group, amount_cents=3000):
+    # Written before the group had a ledger, so no $inc was ever applied for it
+    alice, bob = group.admin, group.members[0]
+    return GroupExpense(group_id=group, paidBy=alice, amount=amount_cents / 100, description="Old", paid_for=[bob],
+                        splitMethod='payment', splitDetails={'payer': str(alice.id), 'shares': {str(bob.id): 100}},
+                        owed=[{'member_id': bob.id, 'owed_cents': amount_cents}], date=datetime(2023, 5, 1)).save()
+
+
+def ledger_balances(group):
+    return GroupLedger.objects.get(group_id=group.id).balances
+
+
+def equal_split(group, amount):
+    alice, bob = group.admin, group.members[0]
+    return {"paid_by": str(bob.id), "amount": amount, "description": "New", "paidFor": [str(alice.id), str(bob.id)],
+            "splitMethod": "equal", "splitDetails": {"payer": str(bob.id), "shares": {str(alice.id): 50, str(bob.id): 50}}}
+
+
+def test_first_write_to_an_old_group_keeps_its_history(client, group, auth_headers):
+    add_old_expense(group)
+    response = client.post(f'/api/groups/{group.id}/add_expense', json=equal_split(group, 10),
+                           headers=auth_headers(group.admin))
+    assert response.status_code == 201
+    alice, bob = str(group.admin.id), str(group.members[0].id)
+    assert ledger_balances(group) == compute_group_balances(group.id) == {alice: -2500, bob: 2500}
+
+
+def test_first_batch_edit_and_delete_keep_history(client, group, auth_headers):
+    headers = auth_headers(group.admin)
+    old = add_old_expense(group)
+    assert client.post(f'/api/groups/{group.id}/add_expenses', json={"expenses": [equal_split(group, 10)]},
+                       headers=headers).status_code == 201
+    GroupLedger.objects(group_id=group.id).delete()
+    assert client.put(f'/api/groups/{group.id}/edit_expense/{old.id}', json={"amount": 40},
+                      headers=headers).status_code == 200
+    assert ledger_balances(group) == compute_group_balances(group.id)
+    GroupLedger.objects(group_id=group.id).delete()
+    assert client.delete(f'/api/groups/{group.id}/expenses/{old.id}', headers=headers).status_code == 200
+    assert ledger_balances(group) == compute_group_balances(group.id)
+
+
+def test_increment_never_creates_a_partial_ledger(group):
+    add_old_expense(group)
+    ensure_group_ledger(group.id)
+    GroupLedger.objects(group_id=group.id).delete()
+    # The write below already happened, so the rebuilt ledger must include it exactly once
+    expense = add_old_expense(group, 500)
+    update_group_ledger(group.id, {str(group.admin.id): -500, str(expense.owed[0]['member_id']): 500})
+    assert ledger_balances(group) == compute_group_balances(group.id)
+
+
+def test_ensure_keeps_an_existing_ledger(group):
+    add_old_expense(group)
+    ensure_group_ledger(group.id)
+    GroupLedger.objects(group_id=group.id).update(set__balances={"someone": 1})
+    ensure_group_ledger(group.id)
+    assert ledger_balances(group) == {"someone": 1}
+
+
+def add_legacy_expense(group):
+    # A custom split written before splits were normalized: shares off 100 and no owed amounts
+    alice, bob = group.admin, group.members[0]
+    expense = GroupExpense(group_id=group, paidBy=alice, amount=30, description="Legacy", paid_for=[alice, bob],
+                           splitMethod='custom',
+                           splitDetails={'payer': str(alice.id), 'shares': {str(alice.id): 40, str(bob.id): 40}},
+                           date=datetime(2023, 5, 1)).save()
+    GroupExpense._get_collection().update_one({'_id': expense.id}, {'$unset': {'owed': 1}})
+    return GroupExpense.objects.get(id=expense.id)
+
+
+def test_editing_or_deleting_a_legacy_row_rebuilds_the_ledger(client, group, auth_headers):
+    headers = auth_headers(group.admin)
+    add_old_expense(group)
+    legacy = add_legacy_expense(group)
+    # Built before the lenient fallback, without the unmigrated row
+    GroupLedger(group_id=group.id, balances={str(group.admin.id): -3000, str(group.members[0].id): 3000}).save()
+    assert client.put(f'/api/groups/{group.id}/edit_expense/{legacy.id}', json={"amount": 50},
+                      headers=headers).status_code == 400
+    alice, bob = str(group.admin.id), str(group.members[0].id)
+    assert client.put(f'/api/groups/{group.id}/edit_expense/{legacy.id}', headers=headers,
+                      json={"splitDetails": {"payer": alice, "shares": {alice: 50, bob: 50}}}).status_code == 200
+    assert ledger_balances(group) == compute_group_balances(group.id) == {alice: -4500, bob: 4500}
+
+    legacy = add_legacy_expense(group)
+    GroupLedger.objects(group_id=group.id).update(set__balances={alice: -3000, bob: 3000})
+    assert client.delete(f'/api/groups/{group.id}/expenses/{legacy.id}', headers=headers).status_code == 200
+    assert ledger_balances(group) == compute_group_balances(group.id) == {alice: -4500, bob: 4500}
+
+
+def test_payer_must_be_a_group_member(client, group, auth_headers, make_user):
+    outsider = make_user("mallory")
+    expense = {**equal_split(group, 10), "paid_by": str(outsider.id)}
+    headers = auth_headers(group.admin)
+    response = client.post(f'/api/groups/{group.id}/add_expense', json=expense, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Payer must be a member of the group"
+    response = client.post(f'/api/groups/{group.id}/add_expenses', json={"expenses": [expense]}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [{"index": 0, "message": "Payer must be a member of the group"}]
+    assert not GroupExpense.objects(group_id=group.id).count()
@@ -0,0 +1,26 @@
+import pytest
+
+OPS_PATHS = ["/metrics", "/api/auth/cache_stats", "/api/auth/hashing_stats", "/api/outbox/stats", "/api/db/stats"]
+
+
+@pytest.fixture
+def ops_token(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'OPS_TOKEN', "ops-secret")
+    return "ops-secret"
+
+
+@pytest.mark.parametrize("path", OPS_PATHS)
+def test_ops_endpoints_need_the_ops_token(client, ops_token, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get(path, headers={"Authorization": f"Bearer {ops_token}"}).status_code == 200
+
+
+@pytest.mark.parametrize("path", OPS_PATHS)
+def test_ops_endpoints_are_off_without_an_ops_token(client, monkeypatch, app, path):
+    monkeypatch.setitem(app.config, 'OPS_TOKEN', None)
+    assert client.get(path, headers={"Authorization": "Bearer "}).status_code == 404
+
+
+def test_a_user_login_is_not_an_ops_token(client, ops_token, make_user, auth_headers):
+    assert client.get("/api/db/stats", headers=auth_headers(make_user("alice"))).status_code == 401
@@ -0,0 +1,100 @@
+import smtplib
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask_mail import Mail
+
+from notifications.outbox import EmailOutbox, OutboxMessage
+
+
+class FakeConnection:
+    def __init__(self, fail_with=None):
+        self.sent = []
+        self.fail_with = fail_with
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, message):
+        if self.fail_with:
+            raise self.fail_with
+        self.sent.append(message)
+
+
+def queue_message(outbox):
+    return outbox.enqueue("Hello", sender="from@example.com", recipients=["to@example.com"], body="Hi")
+
+
+def test_worker_starts_on_the_first_request(app):
+    # Not on the first queued mail: pending mail from before a restart must go out too
+    worker_app = Flask(__name__)
+    worker_app.config['OUTBOX_POLL_SECONDS'] = 3600
+    outbox = EmailOutbox(worker_app, Mail(worker_app))
+    assert outbox._thread is None
+    worker_app.test_client().get('/')
+    assert outbox._thread.is_alive()
+
+
+def test_sent_message_is_not_retried_when_bookkeeping_fails(app, monkeypatch):
+    outbox = app.extensions['email_outbox']
+    message = queue_message(outbox)
+    connection = FakeConnection()
+    monkeypatch.setattr(outbox.mail, 'connect', lambda: connection)
+
+    def metrics_down(*args, **kwargs):
+        raise RuntimeError("metrics backend down")
+    monkeypatch.setattr('notifications.outbox.record_email_sent', metrics_down)
+
+    assert outbox.process_batch() == 1
+    message.reload()
+    assert (message.status, message.attempts, len(connection.sent)) == ('sent', 1, 1)
+    assert outbox.process_batch() == 0
+
+
+def test_failed_send_is_retried_with_backoff(app, monkeypatch):
+    outbox = app.extensions['email_outbox']
+    message = queue_message(outbox)
+    monkeypatch.setattr(outbox.mail, 'connect', lambda: FakeConnection(smtplib.SMTPRecipientsRefused({})))
+
+    assert outbox.process_batch() == 1
+    message.reload()
+    assert (message.status, message.attempts) == ('pending', 1)
+    assert message.next_attempt_at > message.created_at
+    assert OutboxMessage.objects(status='sent').count() == 0
+
+
+def test_sent_message_whose_result_was_not_recorded_is_not_resent(app, monkeypatch):
+    outbox = app.extensions['email_outbox']
+    message = queue_message(outbox)
+    connection = FakeConnection()
+    monkeypatch.setattr(outbox.mail, 'connect', lambda: connection)
+    update = OutboxMessage.update
+
+    def database_down_after_send(self, **kwargs):
+        if kwargs.get('set__status') == 'sent':
+            raise RuntimeError("database down")
+        return update(self, **kwargs)
+    monkeypatch.setattr(OutboxMessage, 'update', database_down_after_send)
+
+    assert outbox.process_batch() == 1
+    # The lease runs out, as it would after the worker gave up on recording it
+    OutboxMessage.objects(id=message.id).update(set__locked_until=datetime.utcnow() - timedelta(seconds=1))
+    assert outbox.process_batch() == 0
+    message.reload()
+    assert (message.status, len(connection.sent)) == ('unconfirmed', 1)
+    assert outbox.stats()["unconfirmed"] == 1
+
+
+def test_expired_lease_before_the_hand_off_is_sent(app, monkeypatch):
+    # A worker that died before giving the message to SMTP leaves it to be claimed again
+    outbox = app.extensions['email_outbox']
+    message = queue_message(outbox)
+    OutboxMessage.objects(id=message.id).update(set__status='sending',
+                                                set__locked_until=datetime.utcnow() - timedelta(seconds=1))
+    connection = FakeConnection()
+    monkeypatch.setattr(outbox.mail, 'connect', lambda: connection)
+    assert outbox.process_batch() == 1
+    assert (message.reload().status, len(connection.sent)) == ('sent', 1)
@@ -0,0 +1,40 @@
+import io
+
+import pytest
+
+from core.models import PersonalExpense, ExpenseRollup
+
+BAD_AMOUNTS = ["nan", "NaN", "inf", "-Infinity", "1e400"]
+
+
+@pytest.mark.parametrize("amount", BAD_AMOUNTS)
+def test_add_rejects_non_finite_amounts(client, make_user, auth_headers, amount):
+    response = client.post('/api/personal_expenses/add', headers=auth_headers(make_user("alice")),
+                           json={"amount": amount, "name": "Lunch", "category": "Food",
+                                 "date": "2024-03-02T10:00:00.000Z"})
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Amount must be a finite number"
+    assert not PersonalExpense.objects.count()
+
+
+def test_add_rejects_non_finite_json_numbers(client, make_user, auth_headers):
+    # json.loads turns NaN, Infinity and 1e400 into floats
+    headers = auth_headers(make_user("alice"))
+    for body in ['NaN', 'Infinity', '1e400']:
+        response = client.post('/api/personal_expenses/add', headers=headers,
+                               content_type='application/json',
+                               data='{"amount": %s, "name": "Lunch", "category": "Food"}' % body)
+        assert response.status_code == 400
+    assert not PersonalExpense.objects.count()
+
+
+def test_import_skips_non_finite_amounts(client, make_user, auth_headers):
+    rows = "\n".join(f"2024-03-0{day},Row {day},{amount},Food" for day, amount in enumerate(["12.50"] + BAD_AMOUNTS, 1))
+    upload = io.BytesIO(f"Date,Description,Amount,Category\n{rows}\n".encode())
+    response = client.post('/api/personal_expenses/import', headers=auth_headers(make_user("alice")),
+                           data={"file": (upload, "bank.csv")}, content_type='multipart/form-data')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["imported"], body["error_count"]) == (1, len(BAD_AMOUNTS))
+    assert PersonalExpense.objects.count() == 1
+    assert [row["total_cents"] for row in ExpenseRollup.objects.as_pymongo()] == [1250]
@@ -0,0 +1,29 @@
+import pytest
+
+from benchmarks.endpoints import personal_cases, group_cases
+from benchmarks.query_budgets import QUERY_BUDGETS, budget_cases, request_within_budget
+from conftest import requires_mongod
+
+# Small enough to seed per test, large enough that an N+1 shows up as repeats
+SIZES = {'users': 30, 'personal_expenses': 600, 'groups': 4, 'group_expenses': 200}
+
+
+@pytest.fixture
+def seeded(app):
+    from benchmarks.seed import seed_database
+    seed_database(SIZES)
+    return {name: (path, user_id) for name, path, user_id in budget_cases()}
+
+
+def test_every_route_has_a_budget():
+    assert set(QUERY_BUDGETS) == set(personal_cases()) | set(group_cases('group_id'))
+
+
+@requires_mongod
+@pytest.mark.parametrize("name", sorted(QUERY_BUDGETS))
+def test_route_stays_within_query_budget(app, client, seeded, name):
+    path, user_id = seeded[name]
+    response, tracker = request_within_budget(client, name, path, user_id, app.config['SECRET_KEY'])
+    assert response.status_code == 200
+    # A route that issues no commands at all is not being measured
+    assert tracker.count > 0
@@ -0,0 +1,73 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from monitoring.query_tracker import QueryTrackingListener, query_budget, query_shape, track_queries
+
+listener = QueryTrackingListener()
+request_ids = itertools.count()
+
+
+def run_command(command_name, command):
+    # What pymongo reports around every command; only these attributes are read
+    event = SimpleNamespace(command_name=command_name, command=command, request_id=next(request_ids))
+    listener.started(event)
+    listener.succeeded(event)
+
+
+def find_user(user_id):
+    run_command('find', {'find': 'user', 'filter': {'_id': user_id}, 'projection': {'username': 1}})
+
+
+def test_shape_replaces_literals_with_their_type():
+    assert query_shape({'_id': {'$in': [ObjectId(), ObjectId()]}, 'n': 3}) == {'_id': {'$in': ['ObjectId']}, 'n': 'int'}
+    assert query_shape({'name': "a"}) == query_shape({'name': "b"})
+
+
+def test_within_budget_passes():
+    with query_budget(2) as tracker:
+        run_command('find', {'find': 'group_expense', 'filter': {'group_id': ObjectId()}})
+        run_command('aggregate', {'aggregate': 'group_ledger', 'pipeline': [{'$match': {'group_id': ObjectId()}}]})
+    assert tracker.count == 2
+    assert [query.collection for query in tracker.queries] == ['group_expense', 'group_ledger']
+
+
+def test_over_budget_fails_and_lists_the_commands():
+    with pytest.raises(AssertionError, match="expected at most 1 Mongo commands, got 2") as error:
+        with query_budget(1):
+            run_command('find', {'find': 'user', 'filter': {'_id': ObjectId()}})
+            run_command('count', {'count': 'group', 'query': {'admin': ObjectId()}})
+    assert "find user" in str(error.value) and "count group" in str(error.value)
+
+
+def test_n_plus_one_fails_even_within_the_count():
+    with pytest.raises(AssertionError, match="N\\+1"):
+        with query_budget(10):
+            for _ in range(3):
+                find_user(ObjectId())
+
+
+def test_repeats_from_different_call_sites_are_not_n_plus_one():
+    with query_budget(10) as tracker:
+        find_user(ObjectId())
+        run_command('find', {'find': 'user', 'filter': {'_id': ObjectId()}, 'projection': {'username': 1}})
+        run_command('find', {'find': 'user', 'filter': {'_id': ObjectId()}, 'projection': {'username': 1}})
+    assert not tracker.repeated_queries()
+
+
+def test_allowed_repeats_and_ignored_commands():
+    with query_budget(3, allow_repeated=True) as tracker:
+        for _ in range(3):
+            find_user(ObjectId())
+        run_command('getMore', {'getMore': 1, 'collection': 'user'})
+        run_command('hello', {'hello': 1})
+    assert tracker.count == 3
+
+
+def test_commands_outside_a_tracked_block_are_not_counted():
+    with track_queries() as tracker:
+        pass
+    find_user(ObjectId())
+    assert tracker.count == 0
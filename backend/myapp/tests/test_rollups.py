@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import requires_mongod
+from core import rollups
+from core.models import User, PersonalExpense, ExpenseRollup
+from core.rollups import rollup_deltas, update_expense_rollups, rebuild_expense_rollups
+
+
+@pytest.fixture
+def python_rollups(monkeypatch):
+    # mongomock has no $round; the same sums computed with to_cents
+    monkeypatch.setattr(rollups, 'compute_expense_rollups',
+                        lambda user_id: rollup_deltas(PersonalExpense.objects(user_id=user_id)))
+
+
+@pytest.fixture
+def alice(make_user):
+    user = make_user("alice")
+    for amount, date in [(12.5, datetime(2024, 3, 1)), (7.25, datetime(2024, 3, 9)), (40, datetime(2023, 3, 5))]:
+        PersonalExpense(user_id=user.id, amount=amount, name="Lunch", category="Food", date=date).save()
+    return user
+
+
+def stored_rollups(user):
+    return {(row['month'], row['category']): [row['count'], row['total_cents']]
+            for row in ExpenseRollup.objects(user_id=user.id).as_pymongo()}
+
+
+def test_first_read_backfills_rollups_written_before_they_existed(client, alice, auth_headers, python_rollups):
+    # A write after the rollups shipped $inc'd only its own expense
+    update_expense_rollups(alice.id, rollup_deltas([PersonalExpense(amount=3, category="Food",
+                                                                    date=datetime(2024, 3, 20))]))
+    PersonalExpense(user_id=alice.id, amount=3, name="Tea", category="Food", date=datetime(2024, 3, 20)).save()
+
+    response = client.get('/api/dashboard/month_summary?month=2024-03', headers=auth_headers(alice))
+    summary = response.get_json()["summary"]
+    assert (summary["total"], summary["count"]) == (22.75, 3)
+    assert summary["previous_year"]["total"] == 40
+    assert User.objects.get(id=alice.id).rollups_built
+
+
+def test_built_rollups_are_not_recomputed(client, alice, auth_headers, python_rollups):
+    User.objects(id=alice.id).update(set__rollups_built=True)
+    response = client.get('/api/dashboard/month_summary?month=2024-03', headers=auth_headers(alice))
+    assert response.get_json()["summary"]["count"] == 0
+
+
+def test_rebuild_keeps_writes_made_while_it_computes(alice, monkeypatch):
+    def compute_during_a_write(user_id):
+        computed = rollup_deltas(PersonalExpense.objects(user_id=user_id))
+        # An expense added after the rebuild computed, before it swaps the rows in
+        expense = PersonalExpense(user_id=user_id, amount=9, name="Taxi", category="Travel",
+                                  date=datetime(2024, 4, 2)).save()
+        update_expense_rollups(user_id, rollup_deltas([expense]))
+        return computed
+    monkeypatch.setattr(rollups, 'compute_expense_rollups', compute_during_a_write)
+
+    rebuild_expense_rollups(alice.id)
+    assert stored_rollups(alice) == rollup_deltas(PersonalExpense.objects(user_id=alice.id))
+
+
+def test_rebuild_removes_stale_rows(alice, python_rollups):
+    update_expense_rollups(alice.id, {("2022-01", "Food"): [1, 500]})
+    rebuild_expense_rollups(alice.id)
+    assert stored_rollups(alice) == rollup_deltas(PersonalExpense.objects(user_id=alice.id))
+
+
+@requires_mongod
+def test_computed_rollups_match_the_incremental_ones(alice):
+    assert rollups.compute_expense_rollups(alice.id) == rollup_deltas(PersonalExpense.objects(user_id=alice.id))
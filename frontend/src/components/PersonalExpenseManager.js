@@ -6,6 +6,7 @@ import EditIcon from '@mui/icons-material/Edit';
 
 function PersonalExpenseManager() {
     const [expenses, setExpenses] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [totalSpent, setTotalSpent] = useState(0);
     const initialBudget = JSON.parse(localStorage.getItem('budget')) || 1000;
     const [editingExpense, setEditingExpense] = useState(null);
@@ -16,13 +17,8 @@ function PersonalExpenseManager() {
         alert(message);
     };
 
-    const isCurrentMonth = (date) => {
-        const expenseDate = new Date(date);
-        const now = new Date();
-        return expenseDate.getMonth() === now.getMonth() && expenseDate.getFullYear() === now.getFullYear();
-    };
-
-    const fetchExpenses = useCallback(async () => {
+    // Loads one page of expenses; without a cursor it starts over from the newest
+    const fetchExpenses = useCallback(async (cursor = null) => {
         const token = localStorage.getItem('token'); 
         if (!token) {
             console.error("User not authenticated");
@@ -30,7 +26,8 @@ function PersonalExpenseManager() {
         }
 
         try {
-            const response = await fetch('http://127.0.0.1:5000/api/personal_expenses', {
+            const url = 'http://127.0.0.1:5000/api/personal_expenses' + (cursor ? `?cursor=${encodeURIComponent(cursor)}` : '');
+            const response = await fetch(url, {
                 method: 'GET',
                 headers: {
                     'Authorization': token
@@ -39,9 +36,8 @@ function PersonalExpenseManager() {
 
             const data = await response.json();
             if (response.ok) {
-                setExpenses(data.expenses); // Assuming the API returns an array of expenses
-                const currentMonthExpenses = data.expenses.filter(expense => isCurrentMonth(expense.date));
-                setTotalSpent(currentMonthExpenses.reduce((sum, expense) => sum + expense.amount, 0));
+                setExpenses(previous => cursor ? previous.concat(data.expenses) : data.expenses);
+                setNextCursor(data.next_cursor);
             } else {
                 console.error(data.message);
             }
@@ -50,6 +46,37 @@ function PersonalExpenseManager() {
         }
     }, []);
 
+    // Spent this month comes from the server's monthly rollups, not from the loaded pages
+    const fetchMonthSummary = useCallback(async () => {
+        const token = localStorage.getItem('token');
+        if (!token) {
+            return;
+        }
+
+        try {
+            const response = await fetch('http://127.0.0.1:5000/api/dashboard/month_summary', {
+                method: 'GET',
+                headers: {
+                    'Authorization': token
+                }
+            });
+
+            const data = await response.json();
+            if (response.ok) {
+                setTotalSpent(data.summary.total);
+            } else {
+                console.error(data.message);
+            }
+        } catch (error) {
+            showAlert("Error fetching spending summary: " + error.message);
+        }
+    }, []);
+
+    const refreshExpenses = () => {
+        fetchExpenses();
+        fetchMonthSummary();
+    };
+
 
 
     const fetchBudget = useCallback(async () => {
@@ -82,8 +109,9 @@ function PersonalExpenseManager() {
 
     useEffect(() => {
         fetchExpenses();
+        fetchMonthSummary();
         fetchBudget();
-    }, [fetchExpenses, fetchBudget]);
+    }, [fetchExpenses, fetchMonthSummary, fetchBudget]);
 
     const updateBudgetAPI = async (newBudget) => {
         const token = localStorage.getItem('token');
@@ -140,7 +168,7 @@ function PersonalExpenseManager() {
   
           const data = await response.json();
           if (response.ok) {
-            fetchExpenses();
+            refreshExpenses();
           } else {
               // Handle any errors returned from the server
               console.error(data.message);
@@ -169,14 +197,8 @@ function PersonalExpenseManager() {
   
       const data = await response.json();
       if (response.ok) {
-        // Update the local state to reflect the deleted expense
-        const updatedExpenses = expenses.filter(expense => expense.id !== id);
-        setExpenses(updatedExpenses);
-        // Recalculate the total spent after deletion
-        const currentMonthExpenses = updatedExpenses.filter(expense => isCurrentMonth(expense.date));
-        setTotalSpent(currentMonthExpenses.reduce((sum, expense) => sum + expense.amount, 0));
         showAlert("Expense deleted successfully");
-        fetchExpenses();
+        refreshExpenses();
       } else {
         // Handle any errors returned from the server
         console.error(data.message);
@@ -211,20 +233,9 @@ function PersonalExpenseManager() {
 
         const data = await response.json();
         if (response.ok) {
-            // Replace the existing expense with the updated one in the local state
-            const updatedExpenses = expenses.map(expense => {
-                if (expense.id === expenseId) {
-                    return { ...expense, ...updatedExpenseData };
-                }
-                return expense;
-            });
-            
-            setExpenses(updatedExpenses);
-            const currentMonthExpenses = updatedExpenses.filter(expense => isCurrentMonth(expense.date));
-            setTotalSpent(currentMonthExpenses.reduce((sum, expense) => sum + expense.amount, 0));
             showAlert("Expense updated successfully");
             setEditingExpense(null);
-            fetchExpenses();
+            refreshExpenses();
         } else {
             showAlert(data.message);
         }
@@ -275,6 +286,11 @@ function PersonalExpenseManager() {
             startEditExpense={startEditExpense}
             deleteExpense={deleteExpense} 
         />
+        {nextCursor && (
+            <button className='load-more-button' onClick={() => fetchExpenses(nextCursor)}>
+                Load more
+            </button>
+        )}
       </div>
     </div>
 );